@@ -1,3 +1,124 @@
+# src/apps/core/api/representation_cache.py
+
+import sys
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.models import User, Asset
+
+
+class RepresentationCache:
+    """
+    Cache LRU limitado, local ao processo, de representações serializadas.
+    Cada entrada é válida apenas para o 'updated_at' com que foi gerada, de modo
+    que uma instância alterada nunca devolve uma representação antiga.
+    Opcionalmente consulta um backend compartilhado do Django (settings.CACHES).
+    Configuração: settings.CMMS_REPRESENTATION_CACHE = {'MAX_ENTRIES': 2000, 'SHARED_BACKEND': None}.
+    """
+
+    def __init__(self, nome: str):
+        config = getattr(settings, 'CMMS_REPRESENTATION_CACHE', {})
+        self.nome = nome
+        self.max_entries = config.get('MAX_ENTRIES', 2000)
+        self.shared_backend = config.get('SHARED_BACKEND')
+        self._entradas = OrderedDict()  # pk -> (updated_at, representação)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def obter(self, instance, serializar) -> dict:
+        """
+        Devolve a representação em cache da instância ou a gera com 'serializar'.
+        """
+        with self._lock:
+            entrada = self._entradas.get(instance.pk)
+            if entrada and entrada[0] == instance.updated_at:
+                self._entradas.move_to_end(instance.pk)
+                self.hits += 1
+                return entrada[1]
+
+        representacao = None
+        if self.shared_backend:
+            chave_compartilhada = f"repr:{self.nome}:{instance.pk}:{instance.updated_at.timestamp()}"
+            representacao = caches[self.shared_backend].get(chave_compartilhada)
+
+        with self._lock:
+            if representacao is not None:
+                self.shared_hits += 1
+            else:
+                self.misses += 1
+
+        if representacao is None:
+            representacao = serializar(instance)
+            if self.shared_backend:
+                caches[self.shared_backend].set(chave_compartilhada, representacao)
+
+        with self._lock:
+            self._entradas[instance.pk] = (instance.updated_at, representacao)
+            self._entradas.move_to_end(instance.pk)
+            while len(self._entradas) > self.max_entries:
+                self._entradas.popitem(last=False)
+        return representacao
+
+    def invalidar(self, pk) -> None:
+        with self._lock:
+            self._entradas.pop(pk, None)
+
+    def metricas(self) -> dict:
+        """
+        Taxa de acerto e uso aproximado de memória (em bytes) do cache local.
+        """
+        with self._lock:
+            consultas = self.hits + self.shared_hits + self.misses
+            memoria = sys.getsizeof(self._entradas) + sum(
+                sys.getsizeof(representacao)
+                + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in representacao.items())
+                for _, representacao in self._entradas.values()
+            )
+            return {
+                'name': self.nome,
+                'entries': len(self._entradas),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.shared_hits) / consultas if consultas else 0.0,
+                'approx_memory_bytes': memoria,
+            }
+
+
+# Um cache por modelo. Os serializers que compartilham um cache devem expor os mesmos campos.
+user_representation_cache = RepresentationCache('user')
+asset_representation_cache = RepresentationCache('asset')
+REPRESENTATION_CACHES = [user_representation_cache, asset_representation_cache]
+
+
+class CachedRepresentationMixin:
+    """
+    Mixin para serializers "slim" somente leitura: reutiliza a representação
+    guardada em 'representation_cache' em vez de serializar novamente.
+    """
+    representation_cache = None
+
+    def to_representation(self, instance):
+        return self.representation_cache.obter(instance, super().to_representation)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidar_representacao_usuario(sender, instance, **kwargs):
+    user_representation_cache.invalidar(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Asset)
+def invalidar_representacao_ativo(sender, instance, **kwargs):
+    asset_representation_cache.invalidar(instance.pk)
+
 # src/apps/core/api/serializers.py
 
 from rest_framework import serializers
@@ -37,20 +158,28 @@ class LocationSerializer(serializers.ModelSerializer):
 
 from rest_framework import serializers
 from apps.core.models import User, Asset
-from apps.tickets.models import Ticket
+from apps.core.api.representation_cache import (
+    CachedRepresentationMixin, user_representation_cache, asset_representation_cache,
+)
+from apps.tickets.models import Ticket, TicketComment, Feedback
+from apps.work_orders.models import WorkOrder, WorkOrderPart, WorkOrderPhoto
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(CachedRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer simplificado para exibir informações do usuário.
     """
+    representation_cache = user_representation_cache
+
     class Meta:
         model = User
         fields = ['id', 'full_name', 'email']
 
-class AssetSerializer(serializers.ModelSerializer):
+class AssetSerializer(CachedRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer simplificado para exibir informações do ativo.
     """
+    representation_cache = asset_representation_cache
+
     class Meta:
         model = Asset
         fields = ['id', 'name', 'asset_tag']
@@ -98,22 +227,109 @@ class TicketCreateSerializer(serializers.ModelSerializer):
         validated_data['requester'] = self.context['request'].user
         return super().create(validated_data)
 
+# --- Serializers da Linha do Tempo do Ticket ---
+# Esperam os dados já carregados por select_related/prefetch_related na view.
+
+class TicketCommentSerializer(serializers.ModelSerializer):
+    """Comentário de um ticket com seu autor."""
+    user = UserSerializer(read_only=True)
+
+    class Meta:
+        model = TicketComment
+        fields = ['id', 'comment', 'created_at', 'user']
+
+class FeedbackSerializer(serializers.ModelSerializer):
+    """Feedback do solicitante sobre o ticket resolvido."""
+    user = UserSerializer(read_only=True)
+
+    class Meta:
+        model = Feedback
+        fields = ['id', 'rating', 'comments', 'created_at', 'user']
+
+class TimelineWorkOrderPartSerializer(serializers.ModelSerializer):
+    """Peça utilizada em uma OS da linha do tempo."""
+    part_id = serializers.UUIDField(source='part.id', read_only=True)
+    name = serializers.CharField(source='part.name', read_only=True)
+    part_number = serializers.CharField(source='part.part_number', read_only=True)
+
+    class Meta:
+        model = WorkOrderPart
+        fields = ['part_id', 'name', 'part_number', 'quantity_used']
+
+class TimelineWorkOrderPhotoSerializer(serializers.ModelSerializer):
+    """Foto de uma OS da linha do tempo, exposta pela miniatura."""
+    thumbnail_url = serializers.SerializerMethodField()
+    photo_url = serializers.CharField(source='photo.url', read_only=True)
+
+    class Meta:
+        model = WorkOrderPhoto
+        fields = ['id', 'thumbnail_url', 'photo_url', 'description', 'uploaded_at']
+
+    def get_thumbnail_url(self, obj):
+        return obj.thumbnail.url if obj.thumbnail else None
+
+class TimelineWorkOrderSerializer(serializers.ModelSerializer):
+    """OS vinculada ao ticket, com aprovações, peças e fotos."""
+    assigned_to = UserSerializer(read_only=True)
+    maintenance_approver = UserSerializer(read_only=True)
+    production_approver = UserSerializer(read_only=True)
+    parts = TimelineWorkOrderPartSerializer(source='workorderpart_set', many=True, read_only=True)
+    photos = TimelineWorkOrderPhotoSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = WorkOrder
+        fields = [
+            'id', 'title', 'status', 'priority', 'assigned_to', 'created_at',
+            'maintenance_approver', 'maintenance_approved_at',
+            'production_approver', 'production_approved_at',
+            'actual_start_at', 'completed_at', 'root_cause', 'action_taken',
+            'parts', 'photos',
+        ]
+
+class TicketTimelineSerializer(serializers.ModelSerializer):
+    """
+    Ticket com comentários, OSs vinculadas e feedback, em uma única resposta.
+    """
+    requester = UserSerializer(read_only=True)
+    asset = AssetSerializer(read_only=True)
+    comments = TicketCommentSerializer(many=True, read_only=True)
+    work_orders = TimelineWorkOrderSerializer(many=True, read_only=True)
+    feedback = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Ticket
+        fields = [
+            'id', 'title', 'description', 'status', 'created_at', 'updated_at',
+            'requester', 'asset', 'comments', 'work_orders', 'feedback',
+        ]
+
+    def get_feedback(self, obj):
+        feedback = getattr(obj, 'feedback', None)
+        return FeedbackSerializer(feedback).data if feedback else None
+
 #src/apps/work_orders/api/serializers.py
 from rest_framework import serializers
-from apps.work_orders.models import WorkOrder
+from apps.work_orders.models import WorkOrder, PartReservation, AssetRiskScore, MeterReadingDaily
 from apps.core.models import User, Asset
+from apps.core.api.representation_cache import (
+    CachedRepresentationMixin, user_representation_cache, asset_representation_cache,
+)
 
 # --- Serializers Aninhados "Slim" ---
 # Para evitar expor todos os dados de modelos relacionados.
 
-class UserSlimSerializer(serializers.ModelSerializer):
+class UserSlimSerializer(CachedRepresentationMixin, serializers.ModelSerializer):
     """Serializer simplificado para usuários."""
+    representation_cache = user_representation_cache
+
     class Meta:
         model = User
         fields = ['id', 'full_name', 'email']
 
-class AssetSlimSerializer(serializers.ModelSerializer):
+class AssetSlimSerializer(CachedRepresentationMixin, serializers.ModelSerializer):
     """Serializer simplificado para ativos."""
+    representation_cache = asset_representation_cache
+
     class Meta:
         model = Asset
         fields = ['id', 'name', 'asset_tag']
@@ -160,4 +376,60 @@ class WorkOrderCreateSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         # O status inicial é definido no próprio modelo como 'awaiting_approval'
-        return WorkOrder.objects.create(**validated_data)
\ No newline at end of file
+        return WorkOrder.objects.create(**validated_data)
+
+class TicketTriageSerializer(serializers.Serializer):
+    """Lista de tickets a serem triados em lote."""
+    ticket_ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=500)
+
+class WorkOrderPartUsageSerializer(serializers.Serializer):
+    """Peça consumida na conclusão de uma Ordem de Serviço."""
+    part_id = serializers.UUIDField()
+    quantity_used = serializers.IntegerField(min_value=1)
+
+class WorkOrderCompletionSerializer(serializers.Serializer):
+    """
+    Valida os dados de conclusão enviados ao WorkOrderService.concluir_trabalho_os.
+    """
+    root_cause = serializers.CharField(required=False, allow_blank=True)
+    action_taken = serializers.CharField(required=False, allow_blank=True)
+    next_os_recommendation = serializers.CharField(required=False, allow_blank=True)
+    parts_used = WorkOrderPartUsageSerializer(many=True, required=False)
+    photos = serializers.ListField(child=serializers.ImageField(), required=False)
+
+class AssetRiskScoreSerializer(serializers.ModelSerializer):
+    """Linha do ranking de risco de ativos."""
+    asset = AssetSlimSerializer(read_only=True)
+
+    class Meta:
+        model = AssetRiskScore
+        fields = [
+            'asset', 'score', 'criticality', 'failure_count',
+            'open_backlog', 'mean_repair_hours', 'computed_at',
+        ]
+
+class PartReservationInputSerializer(serializers.Serializer):
+    """Peça prevista para uma Ordem de Serviço."""
+    part_id = serializers.UUIDField()
+    quantity = serializers.IntegerField(min_value=1)
+
+class PartReservationSerializer(serializers.ModelSerializer):
+    """Reserva de peça de uma Ordem de Serviço."""
+    class Meta:
+        model = PartReservation
+        fields = ['id', 'part', 'quantity', 'status', 'created_at', 'updated_at']
+
+# --- Serializers de Medidores ---
+
+class MeterReadingInputSerializer(serializers.Serializer):
+    """
+    Valida uma leitura de medidor enviada na ingestão em lote.
+    """
+    value = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=0)
+    recorded_at = serializers.DateTimeField()
+
+class MeterReadingDailySerializer(serializers.ModelSerializer):
+    """Serializer de leitura para os agregados diários usados nos gráficos."""
+    class Meta:
+        model = MeterReadingDaily
+        fields = ['day', 'min_value', 'max_value', 'last_value', 'reading_count']
@@ -1,18 +1,36 @@
 #src/apps/work_orders/api/urls.py
 
 from django.urls import path
-from .views import WorkOrderListCreateAPIView, WorkOrderDetailAPIView
+from .views import (
+    WorkOrderListCreateAPIView, WorkOrderDetailAPIView,
+    WorkOrderApproveAPIView, WorkOrderCompleteAPIView, WorkOrderPartReservationAPIView,
+    AssetRiskRankingListAPIView, TicketTriageAPIView,
+    WorkOrderAsyncListAPIView, WorkOrderAsyncDetailAPIView,
+    MeterReadingBulkCreateAPIView, MeterReadingDailyListAPIView,
+)
 
 urlpatterns = [
     path('', WorkOrderListCreateAPIView.as_view(), name='workorder-list-create'),
     path('<uuid:id>/', WorkOrderDetailAPIView.as_view(), name='workorder-detail'),
+    path('<uuid:id>/approve/', WorkOrderApproveAPIView.as_view(), name='workorder-approve'),
+    path('<uuid:id>/complete/', WorkOrderCompleteAPIView.as_view(), name='workorder-complete'),
+    path('<uuid:id>/reservations/', WorkOrderPartReservationAPIView.as_view(), name='workorder-reservations'),
+    path('risk-ranking/', AssetRiskRankingListAPIView.as_view(), name='asset-risk-ranking'),
+    path('triage/', TicketTriageAPIView.as_view(), name='workorder-triage'),
+    path('async/', WorkOrderAsyncListAPIView.as_view(), name='workorder-async-list'),
+    path('async/<uuid:id>/', WorkOrderAsyncDetailAPIView.as_view(), name='workorder-async-detail'),
+    path('meters/<uuid:id>/readings/', MeterReadingBulkCreateAPIView.as_view(), name='meter-reading-bulk-create'),
+    path('meters/<uuid:id>/readings/daily/', MeterReadingDailyListAPIView.as_view(), name='meter-reading-daily-list'),
 ]
 
 
 #src/apps/tickets/api/urls.py
 
 from django.urls import path
-from .views import TicketListCreateAPIView, TicketDetailAPIView
+from .views import (
+    TicketListCreateAPIView, TicketDetailAPIView, TicketTimelineAPIView,
+    TicketAsyncListAPIView, TicketAsyncDetailAPIView,
+)
 
 # O 'app_name' ajuda a organizar as URLs e a evitar conflitos de nomes.
 app_name = 'tickets_api'
@@ -26,16 +44,34 @@ urlpatterns = [
     # O '<uuid:id>' captura o ID do ticket da URL.
     # URL: /api/tickets/<uuid>/
     path('<uuid:id>/', TicketDetailAPIView.as_view(), name='ticket-detail'),
+
+    # Linha do tempo do ticket (comentários, OSs, peças, fotos e feedback) em uma única chamada.
+    # URL: /api/tickets/<uuid>/timeline/
+    path('<uuid:id>/timeline/', TicketTimelineAPIView.as_view(), name='ticket-timeline'),
+
+    # Variantes assíncronas de leitura, para implantação em modo ASGI.
+    # URL: /api/tickets/async/ e /api/tickets/async/<uuid>/
+    path('async/', TicketAsyncListAPIView.as_view(), name='ticket-async-list'),
+    path('async/<uuid:id>/', TicketAsyncDetailAPIView.as_view(), name='ticket-async-detail'),
 ]
 
 # src/apps/core/api/urls.py
 
 from django.urls import path
-from .views import MapListCreateAPIView, LocationListCreateAPIView
+from .views import (
+    MapListCreateAPIView, LocationListCreateAPIView, HistoryAPIView,
+    RepresentationCacheMetricsAPIView, BulkImportAPIView,
+    MapHeatmapAPIView, MapHeatmapOverlayAPIView,
+)
 
 app_name = 'core_api'
 
 urlpatterns = [
     path('maps/', MapListCreateAPIView.as_view(), name='map-list-create'),
+    path('maps/<uuid:id>/heatmap/', MapHeatmapAPIView.as_view(), name='map-heatmap'),
+    path('maps/<uuid:id>/heatmap/overlay/', MapHeatmapOverlayAPIView.as_view(), name='map-heatmap-overlay'),
     path('locations/', LocationListCreateAPIView.as_view(), name='location-list-create'),
+    path('history/', HistoryAPIView.as_view(), name='history'),
+    path('imports/<str:entity>/', BulkImportAPIView.as_view(), name='bulk-import'),
+    path('metrics/representation-cache/', RepresentationCacheMetricsAPIView.as_view(), name='representation-cache-metrics'),
 ]
\ No newline at end of file
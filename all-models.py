@@ -31,6 +31,9 @@ class Ticket(models.Model):
         verbose_name = 'Ticket'
         verbose_name_plural = 'Tickets'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return self.title
@@ -71,6 +74,8 @@ class Feedback(models.Model):
 
 import uuid
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 
 # --- Gerenciador de Usuário Customizado ---
@@ -210,20 +215,168 @@ class InventoryTransaction(models.Model):
     transaction_type = models.CharField(max_length=50) # ex: 'addition', 'deduction'
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    # work_order = models.ForeignKey('work_orders.WorkOrder', ...) # Será adicionado depois
+    work_order = models.ForeignKey(
+        'work_orders.WorkOrder',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='inventory_transactions'
+    )
+    # Indica se a transação já foi somada a Part.quantity_on_hand pela compactação.
+    applied_to_stock = models.BooleanField(default=True)
 
     class Meta:
         db_table = 'inventory_transactions'
         verbose_name = 'Transação de Inventário'
         verbose_name_plural = 'Transações de Inventário'
+        indexes = [
+            models.Index(fields=['part', 'applied_to_stock']),
+        ]
+
+class FailureHeatmapDaily(models.Model):
+    """
+    Contagem diária de OSs e tickets por célula da grade de um mapa, a partir
+    das coordenadas da localização do ativo. Pré-calculada pelo comando
+    'build_heatmap' para que mapas de calor de longos períodos sejam imediatos.
+    """
+    SOURCE_CHOICES = [
+        ('work_order', 'Ordem de Serviço'),
+        ('ticket', 'Ticket'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    map = models.ForeignKey(Map, on_delete=models.CASCADE, related_name='heatmap_cells')
+    day = models.DateField()
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    cell_x = models.IntegerField()
+    cell_y = models.IntegerField()
+    status = models.CharField(max_length=50)
+    priority = models.IntegerField(null=True, blank=True)
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = 'failure_heatmap_daily'
+        verbose_name = 'Mapa de Calor Diário'
+        verbose_name_plural = 'Mapas de Calor Diários'
+        indexes = [
+            models.Index(fields=['map', 'day']),
+            models.Index(fields=['day']),
+        ]
+
+class OutboxEvent(models.Model):
+    """
+    Eventos de domínio gravados na mesma transação das operações da camada
+    de serviço e entregues depois, em lote, pelo worker 'process_outbox'.
+    A chave é sequencial para preservar a ordem dos eventos de um mesmo agregado.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pendente'),
+        ('processed', 'Processado'),
+        ('dead', 'Descartado'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    aggregate_type = models.CharField(max_length=50)
+    aggregate_id = models.CharField(max_length=64)
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField(encoder=DjangoJSONEncoder, default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'outbox_events'
+        verbose_name = 'Evento de Saída'
+        verbose_name_plural = 'Eventos de Saída'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+            models.Index(fields=['aggregate_type', 'aggregate_id', 'status']),
+        ]
+
+class IdempotencyKey(models.Model):
+    """
+    Chaves do cabeçalho 'Idempotency-Key' e a resposta da primeira execução,
+    devolvida sem reexecutar o serviço quando o cliente repete a requisição.
+    Uma chave sem status_code indica uma requisição ainda em processamento.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'idempotency_keys'
+        verbose_name = 'Chave de Idempotência'
+        verbose_name_plural = 'Chaves de Idempotência'
+        unique_together = ('user', 'key')
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+class ArchivedRecord(models.Model):
+    """
+    Registros encerrados movidos das tabelas operacionais (tickets, OSs,
+    comentários, transações de inventário) para o arquivo histórico.
+    As consultas de histórico usam os índices por tipo/data e por ativo, ticket e OS.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    entity_type = models.CharField(max_length=50)
+    original_id = models.CharField(max_length=64)
+    asset_id = models.UUIDField(null=True, blank=True)
+    ticket_id = models.UUIDField(null=True, blank=True)
+    work_order_id = models.UUIDField(null=True, blank=True)
+    record_date = models.DateTimeField()
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'archived_records'
+        verbose_name = 'Registro Arquivado'
+        verbose_name_plural = 'Registros Arquivados'
+        unique_together = ('entity_type', 'original_id', 'record_date')
+        indexes = [
+            models.Index(fields=['entity_type', 'record_date']),
+            models.Index(fields=['asset_id']),
+            models.Index(fields=['ticket_id']),
+            models.Index(fields=['work_order_id']),
+        ]
 
 # src/apps/work_orders/models.py
+import os
 import uuid
+from io import BytesIO
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
 from django.db import models
 from apps.core.models import Asset, Part, User
 from apps.tickets.models import Ticket
 
 
+def gerar_miniatura(imagem, tamanho=(320, 320)) -> ContentFile:
+    """
+    Gera uma miniatura JPEG de uma imagem enviada, preservando a proporção.
+    """
+    from PIL import Image  # Pillow já é dependência do ImageField
+
+    with Image.open(imagem) as original:
+        original.thumbnail(tamanho)
+        buffer = BytesIO()
+        original.convert('RGB').save(buffer, format='JPEG', quality=80)
+    imagem.seek(0)
+
+    nome = os.path.splitext(os.path.basename(imagem.name))[0]
+    return ContentFile(buffer.getvalue(), name=f"{nome}_thumb.jpg")
+
+
 # --- Work Order and Maintenance Models ---
 # Models related to maintenance tasks and scheduling.
 
@@ -275,6 +428,15 @@ class WorkOrder(models.Model):
         related_name='work_orders'
     )
 
+    # Vínculo com o agendamento de PM que gerou a OS (manutenção por medidor)
+    pm_schedule = models.ForeignKey(
+        'PmSchedule',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='work_orders'
+    )
+
     # Campos de Aprovação
     maintenance_approver = models.ForeignKey(
         User,
@@ -308,6 +470,9 @@ class WorkOrder(models.Model):
     class Meta:
         db_table = 'work_orders'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return self.title
@@ -321,6 +486,7 @@ class WorkOrderPhoto(models.Model):
     
     # NOTA: ImageField requer a biblioteca 'Pillow'. Instale com: pip install Pillow
     photo = models.ImageField(upload_to='work_order_photos/')
+    thumbnail = models.ImageField(upload_to='work_order_photos/thumbs/', blank=True, null=True)
     
     description = models.TextField(blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -333,6 +499,12 @@ class WorkOrderPhoto(models.Model):
     def __str__(self):
         return f"Foto para OS {self.work_order.title} carregada em {self.uploaded_at}"
 
+    def save(self, *args, **kwargs):
+        # A miniatura é gerada uma única vez, no envio, para que as telas não baixem a foto original.
+        if self.photo and not self.thumbnail:
+            self.thumbnail = gerar_miniatura(self.photo)
+        super().save(*args, **kwargs)
+
 class WorkOrderPart(models.Model):
     """
     Intermediate model for the Many-to-Many relationship
@@ -346,19 +518,183 @@ class WorkOrderPart(models.Model):
         db_table = 'work_order_parts'
         unique_together = ('work_order', 'part')
 
+class AssetRiskScore(models.Model):
+    """
+    Pontuação de risco pré-calculada de um ativo (0 a 100), combinando
+    criticidade, frequência de falhas, tempo médio de reparo e backlog aberto.
+    Lida pelo ranking de ativos em vez de recalculada a cada consulta.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    asset = models.OneToOneField(Asset, on_delete=models.CASCADE, related_name='risk_score')
+    score = models.FloatField()
+    criticality = models.IntegerField()
+    failure_count = models.PositiveIntegerField()
+    open_backlog = models.PositiveIntegerField()
+    mean_repair_hours = models.FloatField(null=True, blank=True)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'asset_risk_scores'
+        verbose_name = 'Risco do Ativo'
+        verbose_name_plural = 'Riscos dos Ativos'
+        # asset_id desempata pontuações iguais, para que a paginação seja determinística.
+        ordering = ['-score', 'asset_id']
+        indexes = [
+            models.Index(fields=['-score', 'asset']),
+        ]
+
+class PartReservation(models.Model):
+    """
+    Reserva de estoque de uma peça para uma Ordem de Serviço.
+    Fica em uma tabela própria para que reservar não precise atualizar a linha
+    da peça em 'parts'; apenas reservas 'active' reduzem o estoque disponível.
+    """
+    STATUS_CHOICES = [
+        ('planned', 'Planejada'),   # OS ainda aguardando aprovação
+        ('active', 'Ativa'),        # OS aberta ou em andamento
+        ('consumed', 'Consumida'),  # OS concluída
+        ('released', 'Liberada'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    work_order = models.ForeignKey(WorkOrder, on_delete=models.CASCADE, related_name='part_reservations')
+    part = models.ForeignKey(Part, on_delete=models.PROTECT, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='planned')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'part_reservations'
+        verbose_name = 'Reserva de Peça'
+        verbose_name_plural = 'Reservas de Peças'
+        unique_together = ('work_order', 'part')
+        indexes = [
+            models.Index(fields=['part', 'status']),
+        ]
+
+class Meter(models.Model):
+    """
+    Medidor de uso de um ativo (horímetro, contador de ciclos, etc.).
+    Guarda a última leitura para que os gatilhos de PM sejam avaliados
+    sem reler o histórico.
+    """
+    UNIT_CHOICES = [
+        ('hours', 'Horas'),
+        ('cycles', 'Ciclos'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='meters')
+    name = models.CharField(max_length=255)
+    unit = models.CharField(max_length=20, choices=UNIT_CHOICES, default='hours')
+    last_reading_value = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    last_reading_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'meters'
+        verbose_name = 'Medidor'
+        verbose_name_plural = 'Medidores'
+        unique_together = ('asset', 'name')
+
+    def __str__(self):
+        return f"{self.name} ({self.get_unit_display()})"
+
+class MeterReading(models.Model):
+    """
+    Série temporal de leituras de um medidor, consultada pelo índice (meter, recorded_at).
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    meter = models.ForeignKey(Meter, on_delete=models.CASCADE, related_name='readings')
+    value = models.DecimalField(max_digits=14, decimal_places=2)
+    recorded_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'meter_readings'
+        verbose_name = 'Leitura de Medidor'
+        verbose_name_plural = 'Leituras de Medidores'
+        ordering = ['-recorded_at']
+        indexes = [
+            models.Index(fields=['meter', 'recorded_at']),
+        ]
+
+class MeterReadingDaily(models.Model):
+    """
+    Agregado diário das leituras de um medidor, usado pelos gráficos.
+    Mantido de forma incremental a cada ingestão de leituras.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    meter = models.ForeignKey(Meter, on_delete=models.CASCADE, related_name='daily_readings')
+    day = models.DateField()
+    min_value = models.DecimalField(max_digits=14, decimal_places=2)
+    max_value = models.DecimalField(max_digits=14, decimal_places=2)
+    last_value = models.DecimalField(max_digits=14, decimal_places=2)
+    last_recorded_at = models.DateTimeField()
+    reading_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'meter_readings_daily'
+        verbose_name = 'Agregado Diário de Medidor'
+        verbose_name_plural = 'Agregados Diários de Medidores'
+        ordering = ['day']
+        unique_together = ('meter', 'day')
+
 class PmSchedule(models.Model):
     """
     Define tarefas de manutenção preventiva agendadas.
+    O gatilho pode ser por calendário ('time') ou por medidor ('meter').
     """
+    FREQUENCY_TYPE_CHOICES = [
+        ('time', 'Tempo'),
+        ('meter', 'Medidor'),
+    ]
+    FREQUENCY_UNIT_CHOICES = [
+        ('days', 'Dias'),
+        ('weeks', 'Semanas'),
+        ('months', 'Meses'),
+        ('hours', 'Horas'),
+        ('cycles', 'Ciclos'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=255)
     asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='pm_schedules')
+    frequency_type = models.CharField(max_length=20, choices=FREQUENCY_TYPE_CHOICES, default='time')
     frequency = models.PositiveIntegerField()
-    frequency_unit = models.CharField(max_length=20, choices=[('days', 'Dias'), ('weeks', 'Semanas'), ('months', 'Meses')])
+    frequency_unit = models.CharField(max_length=20, choices=FREQUENCY_UNIT_CHOICES)
     last_pm_date = models.DateTimeField(null=True, blank=True)
     next_due_date = models.DateTimeField(null=True, blank=True)
 
+    # Campos para PM baseada em medidor
+    meter = models.ForeignKey(Meter, on_delete=models.CASCADE, null=True, blank=True, related_name='pm_schedules')
+    last_pm_meter_value = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    next_due_meter_value = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+
     class Meta:
         db_table = 'pm_schedules'
         verbose_name = 'Agendamento de PM'
-        verbose_name_plural = 'Agendamentos de PM'
\ No newline at end of file
+        verbose_name_plural = 'Agendamentos de PM'
+
+    def clean(self):
+        if self.frequency_type != 'meter':
+            return
+        if self.meter_id is None:
+            raise ValidationError({'meter': "Uma PM por medidor exige um medidor."})
+        if self.meter.asset_id != self.asset_id:
+            raise ValidationError({'meter': "O medidor deve pertencer ao ativo do agendamento."})
+        if self.frequency_unit != self.meter.unit:
+            raise ValidationError({
+                'frequency_unit': f"A unidade deve ser a do medidor ('{self.meter.unit}')."
+            })
+
+    def save(self, *args, **kwargs):
+        # Sem o próximo vencimento, o gatilho por medidor nunca seria atingido.
+        if self.frequency_type == 'meter' and self.meter_id and self.next_due_meter_value is None:
+            base = self.last_pm_meter_value
+            if base is None:
+                base = self.meter.last_reading_value or 0
+            self.next_due_meter_value = base + self.frequency
+        super().save(*args, **kwargs)
\ No newline at end of file
@@ -1,14 +1,28 @@
 #src/apps/work_orders/services.py
-from django.db import transaction
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.utils import timezone
-from django.db.models import F
+from django.db.models import (
+    Avg, Case, Count, DurationField, Exists, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, When,
+)
+from django.db.models.functions import Coalesce
 
 # Imports dos modelos de outras aplicações
-from apps.core.models import User, Part, InventoryTransaction
+from apps.core.models import User, Asset, Part, InventoryTransaction
+from apps.core.services import OutboxService
 from apps.tickets.models import Ticket
 
 # Imports dos modelos desta aplicação
-from .models import WorkOrder, WorkOrderPhoto, WorkOrderPart
+from .models import (
+    WorkOrder, WorkOrderPhoto, WorkOrderPart, PartReservation, AssetRiskScore,
+    Meter, MeterReading, MeterReadingDaily, PmSchedule,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class WorkOrderService:
@@ -44,10 +58,77 @@ class WorkOrderService:
 
         # Atualiza o status do Ticket para indicar que está sendo tratado.
         ticket.status = 'pending'
-        ticket.save(update_fields=['status'])
+        ticket.save(update_fields=['status', 'updated_at'])
+
+        OutboxService.publicar('work_order', work_order.id, 'work_order.created_from_ticket', {
+            'ticket_id': ticket.id,
+            'asset_id': work_order.asset_id,
+        })
 
         return work_order
 
+    @staticmethod
+    @transaction.atomic
+    def criar_os_em_lote(ticket_ids: list) -> list:
+        """
+        Triagem em lote: cria as Ordens de Serviço de vários tickets de uma vez,
+        com as mesmas regras de criar_os_a_partir_de_ticket, em uma única transação
+        e com um número constante de consultas. Retorna um resultado por ticket,
+        na ordem recebida: {'ticket_id', 'result', 'work_order_id' | 'detail'}.
+        """
+        tickets = {
+            ticket.pk: ticket
+            for ticket in Ticket.objects
+            .select_for_update()
+            .filter(pk__in=ticket_ids)
+            .annotate(tem_os=Exists(WorkOrder.objects.filter(ticket=OuterRef('pk'))))
+        }
+
+        resultados, novas_ordens = [], []
+        for ticket_id in dict.fromkeys(ticket_ids):
+            ticket = tickets.get(ticket_id)
+            if ticket is None:
+                resultados.append({'ticket_id': ticket_id, 'result': 'error', 'detail': "Ticket não encontrado."})
+            elif ticket.tem_os:
+                resultados.append({'ticket_id': ticket_id, 'result': 'error',
+                                   'detail': f"Já existe uma Ordem de Serviço para o Ticket ID {ticket.id}."})
+            elif ticket.status in ['resolved', 'closed']:
+                resultados.append({'ticket_id': ticket_id, 'result': 'error',
+                                   'detail': f"Não é possível criar uma OS para um Ticket com status '{ticket.status}'."})
+            elif ticket.asset_id is None:
+                resultados.append({'ticket_id': ticket_id, 'result': 'error',
+                                   'detail': "O Ticket não possui um ativo associado."})
+            else:
+                ordem = WorkOrder(
+                    title=ticket.title,
+                    description=ticket.description,
+                    asset_id=ticket.asset_id,
+                    ticket=ticket,
+                    status='on_hold',
+                    priority=3
+                )
+                novas_ordens.append(ordem)
+                resultados.append({'ticket_id': ticket_id, 'result': 'created', 'work_order_id': ordem.id})
+
+        if not novas_ordens:
+            return resultados
+
+        WorkOrder.objects.bulk_create(novas_ordens)
+        Ticket.objects.filter(pk__in=[ordem.ticket_id for ordem in novas_ordens]).update(
+            status='pending', updated_at=timezone.now()
+        )
+        OutboxService.publicar_em_lote([
+            ('work_order', ordem.id, 'work_order.created_from_ticket', {
+                'ticket_id': ordem.ticket_id,
+                'asset_id': ordem.asset_id,
+            })
+            for ordem in novas_ordens
+        ])
+
+        # bulk_create não dispara post_save; o risco dos ativos é recalculado uma única vez.
+        AssetRiskService.agendar_recalculo({ordem.asset_id for ordem in novas_ordens})
+        return resultados
+
     @staticmethod
     @transaction.atomic
     def aprovar_os_manutencao(ordem_de_servico: WorkOrder, usuario_aprovador: User) -> WorkOrder:
@@ -76,6 +157,10 @@ class WorkOrderService:
         if usuario_aprovador.role not in ['manager', 'admin']:
             raise PermissionError("O usuário não tem permissão para aprovar Ordens de Serviço.")
 
+        # Relê a OS bloqueada: aprovações simultâneas de manutenção e produção
+        # não podem sobrescrever o aprovador gravado pela outra.
+        ordem_de_servico = WorkOrder.objects.select_for_update().get(pk=ordem_de_servico.pk)
+
         if ordem_de_servico.status != 'on_hold':
             raise ValueError(f"A Ordem de Serviço não está no estado 'on_hold', mas sim '{ordem_de_servico.status}'.")
 
@@ -91,11 +176,18 @@ class WorkOrderService:
             ordem_de_servico.production_approver = usuario_aprovador
             ordem_de_servico.production_approved_at = timezone.now()
 
-        # Se ambas as aprovações foram concedidas, a OS é liberada.
+        # Se ambas as aprovações foram concedidas, a OS é liberada e suas peças planejadas são reservadas.
         if ordem_de_servico.maintenance_approved_at and ordem_de_servico.production_approved_at:
             ordem_de_servico.status = 'open'
+            PartReservationService.ativar_reservas(ordem_de_servico)
 
         ordem_de_servico.save()
+
+        OutboxService.publicar('work_order', ordem_de_servico.id, 'work_order.approved', {
+            'approval_type': tipo_aprovacao,
+            'approver_id': usuario_aprovador.id,
+            'status': ordem_de_servico.status,
+        })
         return ordem_de_servico
     
     @staticmethod
@@ -112,7 +204,7 @@ class WorkOrderService:
             
         ordem_de_servico.status = 'in_progress'
         ordem_de_servico.actual_start_at = timezone.now()
-        ordem_de_servico.save(update_fields=['status', 'actual_start_at'])
+        ordem_de_servico.save(update_fields=['status', 'actual_start_at', 'updated_at'])
 
         return ordem_de_servico
 
@@ -140,32 +232,49 @@ class WorkOrderService:
         ordem_de_servico.next_os_recommendation = dados_de_conclusao.get('next_os_recommendation')
         
         # 2. Processa as peças utilizadas
-        parts_used = dados_de_conclusao.get('parts_used', [])
-        for part_info in parts_used:
-            part_id = part_info.get('part_id')
-            quantity = part_info.get('quantity_used')
-            
-            if not part_id or not quantity or quantity <= 0:
-                continue
+        itens = [
+            (part_info.get('part_id'), part_info.get('quantity_used'))
+            for part_info in dados_de_conclusao.get('parts_used', [])
+        ]
+        itens = [(part_id, quantity) for part_id, quantity in itens if part_id and quantity and quantity > 0]
 
-            part = Part.objects.get(id=part_id)
-            
-            WorkOrderPart.objects.create(
-                work_order=ordem_de_servico,
-                part=part,
-                quantity_used=quantity
-            )
-            
-            InventoryTransaction.objects.create(
-                part=part,
+        pecas = Part.objects.in_bulk([part_id for part_id, _ in itens])
+        for part_id, _ in itens:
+            if part_id not in pecas:
+                raise ValueError(f"Peça ID {part_id} não encontrada.")
+
+        # As reservas ativas desta OS são consumidas agora, então contam como disponíveis para ela.
+        disponivel = PartReservationService.estoque_disponivel(list(pecas))
+        reservado = dict(
+            PartReservation.objects
+            .filter(work_order=ordem_de_servico, status='active')
+            .values_list('part_id', 'quantity')
+        )
+        for part_id, quantity in itens:
+            if quantity > disponivel[part_id] + reservado.get(part_id, 0):
+                raise ValueError(f"Estoque insuficiente para a peça ID {part_id}.")
+
+        WorkOrderPart.objects.bulk_create([
+            WorkOrderPart(work_order=ordem_de_servico, part=pecas[part_id], quantity_used=quantity)
+            for part_id, quantity in itens
+        ])
+
+        # A baixa não atualiza 'parts.quantity_on_hand' aqui, para não disputar a linha
+        # da peça entre conclusões simultâneas; a compactação periódica aplica as transações.
+        InventoryTransaction.objects.bulk_create([
+            InventoryTransaction(
+                part=pecas[part_id],
                 work_order=ordem_de_servico,
                 transaction_type='deduction',
                 quantity_changed=quantity,
-                user=usuario_tecnico
+                user=usuario_tecnico,
+                applied_to_stock=False,
             )
-            
-            part.quantity_on_hand = F('quantity_on_hand') - quantity
-            part.save(update_fields=['quantity_on_hand'])
+            for part_id, quantity in itens
+        ])
+        PartReservation.objects.filter(
+            work_order=ordem_de_servico, status__in=['planned', 'active']
+        ).update(status='consumed', updated_at=timezone.now())
 
         # 3. Processa as fotos
         photos = dados_de_conclusao.get('photos', [])
@@ -177,9 +286,410 @@ class WorkOrderService:
             )
             
         ordem_de_servico.save()
+
+        OutboxService.publicar('work_order', ordem_de_servico.id, 'work_order.completed', {
+            'ticket_id': ordem_de_servico.ticket_id,
+            'completed_by_id': usuario_tecnico.id,
+            'completed_at': ordem_de_servico.completed_at,
+        })
         return ordem_de_servico
 
 
+class PartReservationService:
+    """
+    Reservas de peças e estoque disponível sem contenção na linha da peça.
+    Estoque disponível = quantity_on_hand (saldo compactado)
+                         + transações ainda não compactadas
+                         - reservas ativas.
+    """
+
+    @staticmethod
+    def _variacao_de_estoque():
+        """Quantidade com sinal de uma transação de inventário (baixas são negativas)."""
+        return Case(
+            When(transaction_type='deduction', then=-F('quantity_changed')),
+            default=F('quantity_changed'),
+        )
+
+    @staticmethod
+    def estoque_disponivel(part_ids) -> dict:
+        """
+        Calcula o estoque disponível de várias peças em uma única consulta.
+        """
+        pendente = (
+            InventoryTransaction.objects
+            .filter(part=OuterRef('pk'), applied_to_stock=False)
+            .values('part')
+            .annotate(total=Sum(PartReservationService._variacao_de_estoque()))
+            .values('total')
+        )
+        reservado = (
+            PartReservation.objects
+            .filter(part=OuterRef('pk'), status='active')
+            .values('part')
+            .annotate(total=Sum('quantity'))
+            .values('total')
+        )
+        return dict(
+            Part.objects
+            .filter(pk__in=part_ids)
+            .annotate(disponivel=(
+                F('quantity_on_hand')
+                + Coalesce(Subquery(pendente), 0)
+                - Coalesce(Subquery(reservado), 0)
+            ))
+            .values_list('pk', 'disponivel')
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def planejar_pecas(ordem_de_servico: WorkOrder, itens: list) -> list:
+        """
+        Registra as peças previstas ({'part_id', 'quantity'}) para uma OS.
+        Se a OS já estiver liberada, as reservas entram ativas. A verificação de
+        disponibilidade é otimista: não bloqueia a linha da peça.
+        """
+        if ordem_de_servico.status in ['completed', 'closed']:
+            raise ValueError(f"Não é possível reservar peças para uma OS com status '{ordem_de_servico.status}'.")
+
+        part_ids = [item['part_id'] for item in itens]
+        if len(set(part_ids)) != len(part_ids):
+            raise ValueError("Cada peça deve aparecer uma única vez na lista de reservas.")
+        existentes = Part.objects.in_bulk(part_ids)
+        for part_id in part_ids:
+            if part_id not in existentes:
+                raise ValueError(f"Peça ID {part_id} não encontrada.")
+
+        status_reserva = 'active' if ordem_de_servico.status in ['open', 'in_progress'] else 'planned'
+        reservas = [
+            PartReservation(
+                work_order=ordem_de_servico,
+                part_id=item['part_id'],
+                quantity=item['quantity'],
+                status=status_reserva,
+            )
+            for item in itens
+        ]
+
+        if status_reserva == 'active':
+            disponivel = PartReservationService.estoque_disponivel([reserva.part_id for reserva in reservas])
+            atuais = dict(
+                PartReservation.objects
+                .filter(work_order=ordem_de_servico, status='active')
+                .values_list('part_id', 'quantity')
+            )
+            for reserva in reservas:
+                if reserva.quantity > disponivel[reserva.part_id] + atuais.get(reserva.part_id, 0):
+                    raise ValueError(f"Estoque insuficiente para a peça ID {reserva.part_id}.")
+
+        return PartReservation.objects.bulk_create(
+            reservas,
+            update_conflicts=True,
+            unique_fields=['work_order', 'part'],
+            update_fields=['quantity', 'status', 'updated_at'],
+        )
+
+    @staticmethod
+    def ativar_reservas(ordem_de_servico: WorkOrder) -> int:
+        """
+        Ativa as reservas planejadas de uma OS quando ela é liberada ('open').
+        """
+        return PartReservation.objects.filter(
+            work_order=ordem_de_servico, status='planned'
+        ).update(status='active', updated_at=timezone.now())
+
+    @staticmethod
+    def liberar_reservas(ordem_de_servico: WorkOrder) -> int:
+        """
+        Ajusta as reservas de uma OS que saiu do fluxo sem ser concluída:
+        - fechada: reservas planejadas e ativas são liberadas;
+        - de volta à espera/aprovação: reservas ativas voltam a ser planejadas.
+        """
+        if ordem_de_servico.status == 'closed':
+            de, para = ['planned', 'active'], 'released'
+        elif ordem_de_servico.status in ['awaiting_approval', 'on_hold']:
+            de, para = ['active'], 'planned'
+        else:
+            return 0
+        return PartReservation.objects.filter(
+            work_order=ordem_de_servico, status__in=de
+        ).update(status=para, updated_at=timezone.now())
+
+    @staticmethod
+    def compactar_estoque(max_pecas: int = 500) -> dict:
+        """
+        Soma as transações ainda não compactadas ao saldo de cada peça, com uma
+        única atualização por peça. Uma peça cujo saldo ficaria negativo é
+        registrada em 'falhas' e não impede a compactação das demais.
+        Retorna {'compactadas': int, 'falhas': [part_id, ...]}.
+        """
+        part_ids = list(
+            InventoryTransaction.objects
+            .filter(applied_to_stock=False)
+            .order_by()
+            .values_list('part_id', flat=True)
+            .distinct()[:max_pecas]
+        )
+        compactadas, falhas = 0, []
+        for part_id in part_ids:
+            try:
+                with transaction.atomic():
+                    pendentes = list(
+                        InventoryTransaction.objects
+                        .select_for_update(skip_locked=True)
+                        .filter(part_id=part_id, applied_to_stock=False)
+                        .values_list('pk', 'transaction_type', 'quantity_changed')
+                    )
+                    if not pendentes:
+                        continue
+                    variacao = sum(
+                        -quantidade if tipo == 'deduction' else quantidade
+                        for _, tipo, quantidade in pendentes
+                    )
+                    Part.objects.filter(pk=part_id).update(quantity_on_hand=F('quantity_on_hand') + variacao)
+                    InventoryTransaction.objects.filter(
+                        pk__in=[pk for pk, _, _ in pendentes]
+                    ).update(applied_to_stock=True)
+            except IntegrityError:
+                logger.exception("Falha ao compactar o estoque da peça %s: saldo ficaria negativo.", part_id)
+                falhas.append(part_id)
+                continue
+            compactadas += 1
+        return {'compactadas': compactadas, 'falhas': falhas}
+
+
+class AssetRiskService:
+    """
+    Calcula a pontuação de risco dos ativos em uma única consulta agregada e a
+    grava em 'asset_risk_scores'. Pesos e janelas em settings.CMMS_ASSET_RISK:
+    - criticidade (1 a 5)                                    peso 0.35
+    - falhas corretivas nos últimos FAILURE_WINDOW_DAYS (365), saturando em 12   peso 0.30
+    - tempo médio de reparo nos últimos REPAIR_WINDOW_DAYS (90), saturando em 24 h peso 0.15
+    - OSs em aberto, saturando em 5                          peso 0.20
+    """
+
+    PESOS = {'criticality': 0.35, 'failures': 0.30, 'repair': 0.15, 'backlog': 0.20}
+
+    # Ativos alterados na transação corrente (por thread), recalculados uma única vez no commit.
+    _pendentes = threading.local()
+
+    @staticmethod
+    def agendar_recalculo(asset_ids) -> None:
+        """
+        Agenda o recálculo do risco dos ativos para o commit da transação corrente.
+        Várias chamadas na mesma transação resultam em uma única consulta agregada.
+        """
+        pendentes = getattr(AssetRiskService._pendentes, 'asset_ids', None)
+        if pendentes is None:
+            pendentes = AssetRiskService._pendentes.asset_ids = set()
+        pendentes.update(asset_id for asset_id in asset_ids if asset_id is not None)
+        transaction.on_commit(AssetRiskService._recalcular_pendentes)
+
+    @staticmethod
+    def _recalcular_pendentes() -> None:
+        # O primeiro callback da transação consome o conjunto; os demais não fazem nada.
+        asset_ids = AssetRiskService._pendentes.__dict__.pop('asset_ids', None)
+        if asset_ids:
+            AssetRiskService.recalcular(asset_ids)
+
+    @staticmethod
+    def recalcular(asset_ids=None) -> int:
+        """
+        Recalcula o risco de todos os ativos, ou apenas dos informados.
+        Retorna a quantidade de ativos atualizados.
+        """
+        config = getattr(settings, 'CMMS_ASSET_RISK', {})
+        agora = timezone.now()
+        inicio_falhas = agora - timedelta(days=config.get('FAILURE_WINDOW_DAYS', 365))
+        inicio_reparos = agora - timedelta(days=config.get('REPAIR_WINDOW_DAYS', 90))
+
+        ativos = Asset.objects.all()
+        if asset_ids is not None:
+            ativos = ativos.filter(pk__in=asset_ids)
+        linhas = (
+            ativos
+            .annotate(
+                falhas=Count('work_orders', filter=Q(
+                    work_orders__created_at__gte=inicio_falhas,
+                    work_orders__pm_schedule__isnull=True,
+                )),
+                abertas=Count('work_orders', filter=~Q(work_orders__status__in=['completed', 'closed'])),
+                reparo_medio=Avg(
+                    ExpressionWrapper(
+                        F('work_orders__completed_at') - F('work_orders__actual_start_at'),
+                        output_field=DurationField(),
+                    ),
+                    filter=Q(
+                        work_orders__completed_at__gte=inicio_reparos,
+                        work_orders__actual_start_at__isnull=False,
+                    ),
+                ),
+            )
+            .values_list('pk', 'criticality', 'falhas', 'abertas', 'reparo_medio')
+        )
+
+        pontuacoes = []
+        for asset_id, criticidade, falhas, abertas, reparo_medio in linhas.iterator(chunk_size=2000):
+            horas_reparo = reparo_medio.total_seconds() / 3600 if reparo_medio else None
+            pontuacoes.append(AssetRiskScore(
+                asset_id=asset_id,
+                score=AssetRiskService._pontuar(criticidade, falhas, horas_reparo, abertas),
+                criticality=criticidade,
+                failure_count=falhas,
+                open_backlog=abertas,
+                mean_repair_hours=horas_reparo,
+                computed_at=agora,
+            ))
+
+        AssetRiskScore.objects.bulk_create(
+            pontuacoes,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['asset'],
+            update_fields=['score', 'criticality', 'failure_count', 'open_backlog', 'mean_repair_hours', 'computed_at'],
+        )
+        return len(pontuacoes)
+
+    @staticmethod
+    def _pontuar(criticidade: int, falhas: int, horas_reparo, abertas: int) -> float:
+        pesos = AssetRiskService.PESOS
+        pontuacao = (
+            pesos['criticality'] * min(max(criticidade, 0) / 5, 1)
+            + pesos['failures'] * min(falhas / 12, 1)
+            + pesos['repair'] * min((horas_reparo or 0) / 24, 1)
+            + pesos['backlog'] * min(abertas / 5, 1)
+        )
+        return round(100 * pontuacao, 2)
+
+
+class MeterService:
+    """
+    Ingestão de leituras de medidores e gatilhos de PM baseados em uso.
+    As leituras são gravadas em lote e os gatilhos são avaliados apenas
+    contra o último valor do medidor, sem varrer o histórico.
+    """
+
+    # Tamanho dos lotes de INSERT enviados ao banco.
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    @transaction.atomic
+    def registrar_leituras(meter: Meter, leituras: list) -> list:
+        """
+        Registra um lote de leituras ({'value', 'recorded_at'}) para um medidor,
+        atualiza os agregados diários e cria as OSs de PM cujo intervalo foi atingido.
+        Retorna a lista de Ordens de Serviço criadas.
+        """
+        if not leituras:
+            return []
+
+        # Bloqueia o medidor para serializar ingestões concorrentes do mesmo medidor.
+        meter = Meter.objects.select_for_update().get(pk=meter.pk)
+
+        leituras = sorted(leituras, key=lambda leitura: leitura['recorded_at'])
+        MeterReading.objects.bulk_create(
+            [
+                MeterReading(meter=meter, value=leitura['value'], recorded_at=leitura['recorded_at'])
+                for leitura in leituras
+            ],
+            batch_size=MeterService.BATCH_SIZE,
+        )
+
+        MeterService._atualizar_agregados_diarios(meter, leituras)
+
+        # Leituras atrasadas (anteriores à última conhecida) não movem o medidor.
+        ultima = leituras[-1]
+        if meter.last_reading_at is None or ultima['recorded_at'] >= meter.last_reading_at:
+            meter.last_reading_value = ultima['value']
+            meter.last_reading_at = ultima['recorded_at']
+            meter.save(update_fields=['last_reading_value', 'last_reading_at', 'updated_at'])
+
+        return MeterService._avaliar_gatilhos_pm(meter)
+
+    @staticmethod
+    def _atualizar_agregados_diarios(meter: Meter, leituras: list) -> None:
+        """
+        Consolida as leituras do lote por dia e mescla com os agregados existentes.
+        """
+        por_dia = {}
+        for leitura in leituras:
+            dia = timezone.localdate(leitura['recorded_at'])
+            valor = leitura['value']
+            agregado = por_dia.get(dia)
+            if agregado is None:
+                por_dia[dia] = MeterReadingDaily(
+                    meter=meter,
+                    day=dia,
+                    min_value=valor,
+                    max_value=valor,
+                    last_value=valor,
+                    last_recorded_at=leitura['recorded_at'],
+                    reading_count=1,
+                )
+                continue
+            agregado.min_value = min(agregado.min_value, valor)
+            agregado.max_value = max(agregado.max_value, valor)
+            agregado.last_value = valor
+            agregado.last_recorded_at = leitura['recorded_at']
+            agregado.reading_count += 1
+
+        existentes = MeterReadingDaily.objects.filter(meter=meter, day__in=por_dia.keys())
+        for existente in existentes:
+            agregado = por_dia[existente.day]
+            agregado.min_value = min(agregado.min_value, existente.min_value)
+            agregado.max_value = max(agregado.max_value, existente.max_value)
+            if existente.last_recorded_at > agregado.last_recorded_at:
+                agregado.last_value = existente.last_value
+                agregado.last_recorded_at = existente.last_recorded_at
+            agregado.reading_count += existente.reading_count
+
+        MeterReadingDaily.objects.bulk_create(
+            por_dia.values(),
+            update_conflicts=True,
+            unique_fields=['meter', 'day'],
+            update_fields=['min_value', 'max_value', 'last_value', 'last_recorded_at', 'reading_count'],
+        )
+
+    @staticmethod
+    def _avaliar_gatilhos_pm(meter: Meter) -> list:
+        """
+        Cria uma OS para cada PM por medidor cujo próximo vencimento foi atingido
+        e reprograma o agendamento a partir da leitura atual.
+        """
+        valor_atual = meter.last_reading_value
+        if valor_atual is None:
+            return []
+
+        agendamentos = (
+            PmSchedule.objects
+            .select_for_update()
+            .select_related('asset')
+            .filter(
+                meter=meter,
+                frequency_type='meter',
+                next_due_meter_value__lte=valor_atual,
+            )
+        )
+
+        ordens_criadas = []
+        for agendamento in agendamentos:
+            ordens_criadas.append(WorkOrder.objects.create(
+                title=agendamento.title,
+                description=(
+                    f"PM gerada automaticamente: medidor '{meter.name}' atingiu "
+                    f"{valor_atual} {meter.get_unit_display().lower()}."
+                ),
+                asset=agendamento.asset,
+                pm_schedule=agendamento,
+                status='on_hold',  # Entra no fluxo de aprovação, como as OSs criadas a partir de tickets.
+            ))
+            agendamento.last_pm_meter_value = valor_atual
+            agendamento.next_due_meter_value = valor_atual + agendamento.frequency
+            agendamento.save(update_fields=['last_pm_meter_value', 'next_due_meter_value'])
+
+        return ordens_criadas
+
+
 ##src/apps/tickets/services.py
 
 from django.db import transaction
@@ -187,6 +697,7 @@ from django.utils import timezone
 
 # Imports dos modelos
 from apps.core.models import User
+from apps.core.services import OutboxService
 from apps.tickets.models import Ticket, Feedback
 from apps.work_orders.models import WorkOrder
 
@@ -217,7 +728,12 @@ class TicketService:
             raise ValueError("Não há Ordem de Serviço associada a este ticket para verificar a conclusão.")
 
         ticket.status = 'resolved'
-        ticket.save(update_fields=['status'])
+        ticket.save(update_fields=['status', 'updated_at'])
+
+        OutboxService.publicar('ticket', ticket.id, 'ticket.resolved', {
+            'work_order_id': work_order.id,
+            'requester_id': ticket.requester_id,
+        })
         return ticket
 
     @staticmethod
@@ -267,6 +783,1293 @@ class TicketService:
 
         # Atualiza o status do ticket
         ticket.status = 'closed'
-        ticket.save(update_fields=['status'])
-        
-        return ticket
\ No newline at end of file
+        ticket.save(update_fields=['status', 'updated_at'])
+
+        OutboxService.publicar('ticket', ticket.id, 'ticket.closed', {
+            'closed_by_id': usuario_gerente.id,
+        })
+        return ticket
+
+
+# src/apps/core/services.py
+
+import logging
+from collections import defaultdict, deque
+from datetime import datetime, time, timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.core.models import InventoryTransaction, ArchivedRecord, OutboxEvent, FailureHeatmapDaily
+from apps.tickets.models import Ticket, TicketComment, Feedback
+from apps.work_orders.models import WorkOrder, WorkOrderPart, WorkOrderPhoto
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxService:
+    """
+    Outbox transacional: os serviços gravam eventos na mesma transação da
+    mudança de estado, e um worker os entrega aos consumidores depois, em lotes,
+    com novas tentativas e respeitando a ordem dos eventos de cada agregado.
+    Assim, a latência das requisições não depende dos consumidores.
+    """
+
+    BATCH_SIZE = 100
+    MAX_ATTEMPTS = 10
+
+    # event_type -> lista de funções que recebem o OutboxEvent.
+    _handlers = defaultdict(list)
+
+    @staticmethod
+    def registrar_handler(event_type: str):
+        """
+        Decorator para registrar um consumidor de um tipo de evento.
+        Deve ser usado no AppConfig.ready() do app consumidor.
+        """
+        def decorator(func):
+            OutboxService._handlers[event_type].append(func)
+            return func
+        return decorator
+
+    @staticmethod
+    def publicar(aggregate_type: str, aggregate_id, event_type: str, payload: dict = None) -> OutboxEvent:
+        """
+        Grava um evento no outbox. Deve ser chamado dentro da transação do serviço
+        que originou o evento, para que ambos sejam confirmados ou desfeitos juntos.
+        """
+        return OutboxEvent.objects.create(
+            aggregate_type=aggregate_type,
+            aggregate_id=str(aggregate_id),
+            event_type=event_type,
+            payload=payload or {},
+        )
+
+    @staticmethod
+    def publicar_em_lote(eventos: list) -> list:
+        """
+        Grava vários eventos (aggregate_type, aggregate_id, event_type, payload)
+        com um único INSERT, dentro da transação do serviço chamador.
+        """
+        return OutboxEvent.objects.bulk_create([
+            OutboxEvent(
+                aggregate_type=aggregate_type,
+                aggregate_id=str(aggregate_id),
+                event_type=event_type,
+                payload=payload or {},
+            )
+            for aggregate_type, aggregate_id, event_type, payload in eventos
+        ])
+
+    @staticmethod
+    @transaction.atomic
+    def processar_lote(batch_size: int = None) -> int:
+        """
+        Entrega um lote de eventos pendentes. Um evento só é entregue quando todos
+        os eventos anteriores do mesmo agregado já foram; se um falhar, os seguintes
+        do agregado aguardam a próxima tentativa. Retorna quantos foram processados.
+        """
+        eventos = list(
+            OutboxEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending', available_at__lte=timezone.now())
+            .order_by('id')[:batch_size or OutboxService.BATCH_SIZE]
+        )
+        if not eventos:
+            return 0
+
+        # Fila de eventos pendentes por agregado, incluindo os que estão fora do lote.
+        pendentes = defaultdict(deque)
+        for aggregate_type, aggregate_id, evento_id in (
+            OutboxEvent.objects
+            .filter(status='pending', aggregate_id__in={evento.aggregate_id for evento in eventos})
+            .order_by('id')
+            .values_list('aggregate_type', 'aggregate_id', 'id')
+        ):
+            pendentes[(aggregate_type, aggregate_id)].append(evento_id)
+
+        processados = 0
+        for evento in eventos:
+            fila = pendentes[(evento.aggregate_type, evento.aggregate_id)]
+            if not fila or fila[0] != evento.id:
+                continue
+
+            try:
+                with transaction.atomic():
+                    for handler in OutboxService._handlers.get(evento.event_type, []):
+                        handler(evento)
+            except Exception as e:
+                logger.exception("Falha ao processar o evento de outbox %s.", evento.id)
+                OutboxService._registrar_falha(evento, e)
+                # Bloqueia os eventos seguintes deste agregado até a próxima tentativa.
+                fila.clear()
+                continue
+
+            fila.popleft()
+            evento.status = 'processed'
+            evento.processed_at = timezone.now()
+            evento.save(update_fields=['status', 'processed_at'])
+            processados += 1
+        return processados
+
+    @staticmethod
+    def _registrar_falha(evento: OutboxEvent, erro: Exception) -> None:
+        """
+        Reagenda o evento com backoff exponencial ou o descarta após MAX_ATTEMPTS.
+        """
+        evento.attempts += 1
+        evento.last_error = str(erro)
+        if evento.attempts >= OutboxService.MAX_ATTEMPTS:
+            evento.status = 'dead'
+        else:
+            evento.available_at = timezone.now() + timedelta(seconds=min(2 ** evento.attempts, 3600))
+        evento.save(update_fields=['attempts', 'last_error', 'status', 'available_at'])
+
+    @staticmethod
+    def purgar_eventos(dias: int = None, batch_size: int = 5000) -> int:
+        """
+        Remove, em lotes, os eventos processados ou descartados há mais de
+        settings.CMMS_OUTBOX_RETENTION_DAYS (7 dias). Eventos pendentes nunca
+        são removidos. Retorna o total de eventos removidos.
+        """
+        if dias is None:
+            dias = getattr(settings, 'CMMS_OUTBOX_RETENTION_DAYS', 7)
+        corte = timezone.now() - timedelta(days=dias)
+        expirados = OutboxEvent.objects.filter(
+            Q(status='processed', processed_at__lt=corte)
+            | Q(status='dead', created_at__lt=corte)
+        )
+
+        total = 0
+        while True:
+            ids = list(expirados.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return total
+            removidos, _ = OutboxEvent.objects.filter(pk__in=ids).delete()
+            total += removidos
+
+
+class ArchiveService:
+    """
+    Move registros encerrados e antigos das tabelas operacionais para `archived_records`
+    e oferece uma leitura unificada (operacional + arquivo) para histórico e auditoria.
+    Cada lote roda em sua própria transação curta; uma execução interrompida é
+    retomada simplesmente executando o arquivamento novamente.
+    """
+
+    BATCH_SIZE = 500
+
+    # entity_type -> (modelo, campo de data usado como referência do registro)
+    ENTIDADES = {
+        'ticket': (Ticket, 'updated_at'),
+        'ticket_comment': (TicketComment, 'created_at'),
+        'feedback': (Feedback, 'created_at'),
+        'work_order': (WorkOrder, 'updated_at'),
+        'work_order_part': (WorkOrderPart, None),
+        'work_order_photo': (WorkOrderPhoto, 'uploaded_at'),
+        'inventory_transaction': (InventoryTransaction, 'created_at'),
+    }
+
+    # Entidades cujo próprio id é o filtro de histórico (ex: work_order=<id> de uma OS).
+    CAMPO_PROPRIO = {'ticket': 'ticket_id', 'work_order': 'work_order_id'}
+
+    @staticmethod
+    def data_de_corte(dias: int = None):
+        """
+        Registros encerrados antes desta data são elegíveis para arquivamento.
+        O padrão vem de settings.CMMS_ARCHIVE_AFTER_DAYS (365 dias).
+        """
+        if dias is None:
+            dias = getattr(settings, 'CMMS_ARCHIVE_AFTER_DAYS', 365)
+        return timezone.now() - timedelta(days=dias)
+
+    @staticmethod
+    def arquivar_registros(dias: int = None, batch_size: int = None, on_progress=None) -> dict:
+        """
+        Arquiva, em lotes, OSs concluídas/fechadas, tickets fechados e transações
+        de inventário mais antigos que a data de corte. Retorna o total por entidade.
+        """
+        corte = ArchiveService.data_de_corte(dias)
+        batch_size = batch_size or ArchiveService.BATCH_SIZE
+
+        # A ordem importa: um ticket só é arquivado quando não tem mais OSs operacionais.
+        etapas = [
+            ('work_order', ArchiveService._arquivar_lote_work_orders),
+            ('ticket', ArchiveService._arquivar_lote_tickets),
+            ('inventory_transaction', ArchiveService._arquivar_lote_inventory_transactions),
+        ]
+
+        totais = {}
+        for entidade, arquivar_lote in etapas:
+            total = 0
+            while True:
+                quantidade = arquivar_lote(corte, batch_size)
+                if not quantidade:
+                    break
+                total += quantidade
+                if on_progress:
+                    on_progress(entidade, total)
+            totais[entidade] = total
+        return totais
+
+    @staticmethod
+    @transaction.atomic
+    def _arquivar_lote_work_orders(corte, batch_size: int) -> int:
+        datas = dict(
+            WorkOrder.objects
+            .select_for_update(skip_locked=True)
+            .filter(status__in=['completed', 'closed'], updated_at__lt=corte)
+            # Enquanto o ticket não é fechado, a OS ainda é usada para resolvê-lo e na linha do tempo.
+            .filter(Q(ticket__isnull=True) | Q(ticket__status='closed'))
+            # Baixas ainda não compactadas precisam continuar vinculadas à OS operacional.
+            .filter(~Exists(InventoryTransaction.objects.filter(
+                work_order=OuterRef('pk'), applied_to_stock=False,
+            )))
+            .order_by('pk')
+            .values_list('pk', 'updated_at')[:batch_size]
+        )
+        if not datas:
+            return 0
+
+        ids = list(datas)
+        transacoes = InventoryTransaction.objects.filter(work_order_id__in=ids)
+        ArchiveService._copiar('work_order', WorkOrder.objects.filter(pk__in=ids),
+                               lambda linha: linha['updated_at'])
+        ArchiveService._copiar('work_order_part', WorkOrderPart.objects.filter(work_order_id__in=ids),
+                               lambda linha: datas[linha['work_order_id']])
+        ArchiveService._copiar('work_order_photo', WorkOrderPhoto.objects.filter(work_order_id__in=ids),
+                               lambda linha: datas[linha['work_order_id']])
+        # As transações da OS são arquivadas antes do delete, que anularia o work_order_id (SET_NULL).
+        ArchiveService._copiar('inventory_transaction', transacoes,
+                               lambda linha: linha['created_at'])
+        transacoes.delete()
+
+        # Peças e fotos são removidas em cascata junto com a OS.
+        WorkOrder.objects.filter(pk__in=ids).delete()
+        return len(ids)
+
+    @staticmethod
+    @transaction.atomic
+    def _arquivar_lote_tickets(corte, batch_size: int) -> int:
+        datas = dict(
+            Ticket.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='closed', updated_at__lt=corte)
+            .filter(~Exists(WorkOrder.objects.filter(ticket=OuterRef('pk'))))
+            .order_by('pk')
+            .values_list('pk', 'updated_at')[:batch_size]
+        )
+        if not datas:
+            return 0
+
+        ids = list(datas)
+        ArchiveService._copiar('ticket', Ticket.objects.filter(pk__in=ids),
+                               lambda linha: linha['updated_at'])
+        ArchiveService._copiar('ticket_comment', TicketComment.objects.filter(ticket_id__in=ids),
+                               lambda linha: datas[linha['ticket_id']])
+        ArchiveService._copiar('feedback', Feedback.objects.filter(ticket_id__in=ids),
+                               lambda linha: datas[linha['ticket_id']])
+
+        # Comentários e feedback são removidos em cascata junto com o ticket.
+        Ticket.objects.filter(pk__in=ids).delete()
+        return len(ids)
+
+    @staticmethod
+    @transaction.atomic
+    def _arquivar_lote_inventory_transactions(corte, batch_size: int) -> int:
+        ids = list(
+            InventoryTransaction.objects
+            .select_for_update(skip_locked=True)
+            .filter(created_at__lt=corte, applied_to_stock=True)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+
+        ArchiveService._copiar('inventory_transaction', InventoryTransaction.objects.filter(pk__in=ids),
+                               lambda linha: linha['created_at'])
+        InventoryTransaction.objects.filter(pk__in=ids).delete()
+        return len(ids)
+
+    @staticmethod
+    def _copiar(entity_type: str, queryset, data_do_registro) -> None:
+        """
+        Copia as linhas do queryset para o arquivo. Conflitos são ignorados para
+        que um lote reexecutado após uma falha não duplique registros.
+        """
+        campo_proprio = ArchiveService.CAMPO_PROPRIO.get(entity_type)
+
+        def vinculos(linha):
+            valores = {campo: linha.get(campo) for campo in ('asset_id', 'ticket_id', 'work_order_id')}
+            if campo_proprio:
+                valores[campo_proprio] = linha['id']
+            return valores
+
+        ArchivedRecord.objects.bulk_create(
+            [
+                ArchivedRecord(
+                    entity_type=entity_type,
+                    original_id=str(linha['id']),
+                    record_date=data_do_registro(linha),
+                    data=linha,
+                    **vinculos(linha),
+                )
+                for linha in queryset.values()
+            ],
+            batch_size=ArchiveService.BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+    @staticmethod
+    def consultar_historico(
+        entity_type: str,
+        asset_id=None,
+        ticket_id=None,
+        work_order_id=None,
+        inicio=None,
+        fim=None,
+        limite: int = 100,
+    ) -> list:
+        """
+        Retorna registros de um tipo de entidade vindos tanto das tabelas
+        operacionais quanto do arquivo, no mesmo formato, do mais recente
+        para o mais antigo. Cada item indica se está arquivado.
+        `inicio` e `fim` são datas (inclusivas).
+        """
+        if entity_type not in ArchiveService.ENTIDADES:
+            raise ValueError(f"Tipo de entidade desconhecido: '{entity_type}'.")
+
+        # Convertidos para limites de data/hora para que os índices das colunas sejam usados.
+        if inicio:
+            inicio = timezone.make_aware(datetime.combine(inicio, time.min))
+        if fim:
+            fim = timezone.make_aware(datetime.combine(fim + timedelta(days=1), time.min))
+
+        modelo, campo_data = ArchiveService.ENTIDADES[entity_type]
+        campos = {campo.attname for campo in modelo._meta.concrete_fields}
+        filtros = {
+            campo: valor
+            for campo, valor in [('asset_id', asset_id), ('ticket_id', ticket_id), ('work_order_id', work_order_id)]
+            if valor is not None
+        }
+
+        arquivados = ArchivedRecord.objects.filter(entity_type=entity_type, **filtros)
+        if inicio:
+            arquivados = arquivados.filter(record_date__gte=inicio)
+        if fim:
+            arquivados = arquivados.filter(record_date__lt=fim)
+        registros = [
+            {'archived': True, 'record_date': registro.record_date, 'data': registro.data}
+            for registro in arquivados.order_by('-record_date')[:limite]
+        ]
+
+        # O filtro pelo próprio registro (ex: work_order=<id> em OSs) vira um filtro por pk.
+        campo_proprio = ArchiveService.CAMPO_PROPRIO.get(entity_type)
+        filtros_operacionais = {
+            ('pk' if campo == campo_proprio else campo): valor for campo, valor in filtros.items()
+        }
+
+        # Um filtro que o modelo não possui significa que nenhuma linha operacional se aplica.
+        if set(filtros_operacionais) <= campos | {'pk'}:
+            operacionais = modelo.objects.filter(**filtros_operacionais)
+            if campo_data:
+                if inicio:
+                    operacionais = operacionais.filter(**{f'{campo_data}__gte': inicio})
+                if fim:
+                    operacionais = operacionais.filter(**{f'{campo_data}__lt': fim})
+                operacionais = operacionais.order_by(f'-{campo_data}')
+            registros += [
+                {'archived': False, 'record_date': linha[campo_data] if campo_data else None, 'data': linha}
+                for linha in operacionais.values()[:limite]
+            ]
+
+        registros.sort(key=lambda registro: registro['record_date'] or timezone.now(), reverse=True)
+        return registros[:limite]
+
+
+class HeatmapService:
+    """
+    Mapa de calor de falhas: agrega OSs e tickets por célula da grade de cada
+    mapa, pela data de abertura. Os agregados são diários e pré-calculados, de
+    modo que a consulta de um período soma poucas linhas por célula.
+    O status e a prioridade são os atuais de cada registro: quando eles mudam,
+    o dia de abertura do registro precisa ser recalculado (ver dias_alterados).
+    O tamanho da célula (em pixels da imagem do mapa) vem de
+    settings.CMMS_HEATMAP_CELL_SIZE (50).
+    """
+
+    @staticmethod
+    def tamanho_celula() -> int:
+        return getattr(settings, 'CMMS_HEATMAP_CELL_SIZE', 50)
+
+    @staticmethod
+    def dias_alterados(desde) -> set:
+        """
+        Dias de abertura das OSs e tickets alterados desde o instante informado,
+        cujos agregados podem ter ficado com status ou prioridade desatualizados.
+        """
+        dias = set()
+        for modelo in (WorkOrder, Ticket):
+            dias.update(
+                modelo.objects
+                .filter(updated_at__gte=desde)
+                .annotate(dia=TruncDate('created_at'))
+                .order_by()
+                .values_list('dia', flat=True)
+                .distinct()
+            )
+        return dias
+
+    @staticmethod
+    @transaction.atomic
+    def recalcular_dia(dia) -> int:
+        """
+        Recalcula os agregados de um dia com uma consulta agrupada por fonte.
+        Retorna o número de células gravadas.
+        """
+        tamanho = HeatmapService.tamanho_celula()
+        # Intervalo do dia local em vez de created_at__date, para que o índice de created_at seja usado.
+        periodo = {
+            'created_at__gte': timezone.make_aware(datetime.combine(dia, time.min)),
+            'created_at__lt': timezone.make_aware(datetime.combine(dia + timedelta(days=1), time.min)),
+        }
+        localizacao_valida = {
+            'asset__location__map__isnull': False,
+            'asset__location__x_coordinate__isnull': False,
+            'asset__location__y_coordinate__isnull': False,
+        }
+        agrupamento = {
+            'map_ref': F('asset__location__map'),
+            'cx': F('asset__location__x_coordinate') / tamanho,
+            'cy': F('asset__location__y_coordinate') / tamanho,
+        }
+
+        ordens = (
+            WorkOrder.objects
+            .filter(**periodo, **localizacao_valida)
+            .values('status', 'priority', **agrupamento)
+            .annotate(total=Count('id'))
+        )
+        tickets = (
+            Ticket.objects
+            .filter(**periodo, **localizacao_valida)
+            .values('status', **agrupamento)
+            .annotate(total=Count('id'))
+        )
+
+        celulas = [
+            FailureHeatmapDaily(
+                map_id=linha['map_ref'],
+                day=dia,
+                source=fonte,
+                cell_x=linha['cx'],
+                cell_y=linha['cy'],
+                status=linha['status'],
+                priority=linha.get('priority'),
+                count=linha['total'],
+            )
+            for fonte, linhas in [('work_order', ordens), ('ticket', tickets)]
+            for linha in linhas
+        ]
+
+        FailureHeatmapDaily.objects.filter(day=dia).delete()
+        FailureHeatmapDaily.objects.bulk_create(celulas, batch_size=1000)
+        return len(celulas)
+
+    @staticmethod
+    def consultar(map_id, inicio, fim, source=None, status=None, priority=None) -> dict:
+        """
+        Soma os agregados diários de um mapa no período, por célula.
+        Retorna um JSON compacto: 'cells' é uma lista de [cell_x, cell_y, count].
+        """
+        agregados = FailureHeatmapDaily.objects.filter(map_id=map_id, day__gte=inicio, day__lte=fim)
+        if source:
+            agregados = agregados.filter(source=source)
+        if status:
+            agregados = agregados.filter(status=status)
+        if priority is not None:
+            agregados = agregados.filter(priority=priority)
+
+        celulas = (
+            agregados
+            .values('cell_x', 'cell_y')
+            .annotate(total=Sum('count'))
+            .order_by()
+            .values_list('cell_x', 'cell_y', 'total')
+        )
+        return {
+            'map_id': str(map_id),
+            'cell_size': HeatmapService.tamanho_celula(),
+            'start': str(inicio),
+            'end': str(fim),
+            'cells': [list(celula) for celula in celulas],
+        }
+
+    @staticmethod
+    def renderizar_overlay(largura: int, altura: int, resultado: dict) -> bytes:
+        """
+        Renderiza o mapa de calor como um PNG transparente do tamanho da imagem do
+        mapa, para ser sobreposto a ela. A opacidade é proporcional à contagem.
+        """
+        from PIL import Image, ImageDraw  # Pillow já é dependência do ImageField
+
+        imagem = Image.new('RGBA', (largura, altura), (0, 0, 0, 0))
+        desenho = ImageDraw.Draw(imagem)
+        tamanho = resultado['cell_size']
+        maximo = max((total for _, _, total in resultado['cells']), default=0)
+        for cell_x, cell_y, total in resultado['cells']:
+            opacidade = int(40 + 180 * total / maximo)
+            x, y = cell_x * tamanho, cell_y * tamanho
+            desenho.rectangle([x, y, x + tamanho - 1, y + tamanho - 1], fill=(220, 38, 38, opacidade))
+
+        buffer = BytesIO()
+        imagem.save(buffer, format='PNG')
+        return buffer.getvalue()
+
+
+# src/apps/core/importers.py
+
+import csv
+import io
+from itertools import islice
+
+from django.db import transaction
+
+from apps.core.models import Map, Location, Asset, Part
+
+
+def _texto(valor) -> str:
+    return '' if valor is None else str(valor).strip()
+
+
+def _inteiro(linha: dict, campo: str, problemas: dict, padrao=None, minimo=None, maximo=None):
+    """
+    Converte um campo da linha para inteiro, registrando o problema em 'problemas'.
+    """
+    valor = linha.get(campo)
+    if not valor:
+        return padrao
+    try:
+        numero = int(float(valor))
+    except (ValueError, OverflowError):
+        problemas[campo] = 'Deve ser um número inteiro.'
+        return None
+    if (minimo is not None and numero < minimo) or (maximo is not None and numero > maximo):
+        problemas[campo] = f"Deve estar entre {minimo} e {maximo}." if maximo is not None else f"Deve ser no mínimo {minimo}."
+        return None
+    return numero
+
+
+class BulkImportService:
+    """
+    Importação em massa de Localizações, Ativos e Peças a partir de CSV ou XLSX.
+    O arquivo é lido em streaming e processado em lotes: cada lote resolve suas
+    referências com uma consulta por tabela, grava com um único upsert e roda em
+    sua própria transação, de modo que o arquivo nunca é carregado inteiro na memória.
+    As chaves de upsert são 'name' (localizações), 'asset_tag' (ativos) e 'part_number' (peças).
+    """
+
+    CHUNK_SIZE = 1000
+    # Limite de erros detalhados no relatório; o total é sempre contado.
+    MAX_ERRORS = 1000
+
+    @staticmethod
+    def ler_linhas(arquivo, nome_arquivo: str):
+        """
+        Gera as linhas de um arquivo CSV ou XLSX (aberto em modo binário) como
+        dicionários indexados pelo cabeçalho em minúsculas.
+        """
+        if nome_arquivo.lower().endswith('.xlsx'):
+            try:
+                from openpyxl import load_workbook
+            except ImportError:
+                raise ValueError("A importação de arquivos XLSX requer a biblioteca 'openpyxl'.")
+
+            linhas = load_workbook(arquivo, read_only=True, data_only=True).active.iter_rows(values_only=True)
+            cabecalho = [_texto(coluna).lower() for coluna in next(linhas, [])]
+            for valores in linhas:
+                yield {coluna: _texto(valor) for coluna, valor in zip(cabecalho, valores)}
+        else:
+            leitor = csv.DictReader(io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline=''))
+            for linha in leitor:
+                yield {_texto(coluna).lower(): _texto(valor) for coluna, valor in linha.items() if coluna is not None}
+
+    @staticmethod
+    def importar(entidade: str, linhas, chunk_size: int = None, on_progress=None) -> dict:
+        """
+        Valida e grava as linhas em lotes. Retorna um relatório com os totais de
+        linhas processadas, criadas, atualizadas e os erros por linha do arquivo.
+        """
+        processadores = {
+            'locations': BulkImportService._processar_localizacoes,
+            'assets': BulkImportService._processar_ativos,
+            'parts': BulkImportService._processar_pecas,
+        }
+        if entidade not in processadores:
+            raise ValueError(f"Entidade de importação desconhecida: '{entidade}'.")
+        processar = processadores[entidade]
+
+        relatorio = {'processed': 0, 'created': 0, 'updated': 0, 'error_count': 0, 'errors': []}
+        # Chaves já vistas em todo o arquivo (só as chaves, para manter a memória pequena).
+        vistas = set()
+        # A linha 1 do arquivo é o cabeçalho.
+        numeradas = (
+            (numero, linha) for numero, linha in enumerate(linhas, start=2) if any(linha.values())
+        )
+        while True:
+            lote = list(islice(numeradas, chunk_size or BulkImportService.CHUNK_SIZE))
+            if not lote:
+                break
+
+            with transaction.atomic():
+                criados, atualizados, erros = processar(lote, vistas)
+
+            relatorio['processed'] += len(lote)
+            relatorio['created'] += criados
+            relatorio['updated'] += atualizados
+            relatorio['error_count'] += len(erros)
+            relatorio['errors'].extend(erros[:BulkImportService.MAX_ERRORS - len(relatorio['errors'])])
+            if on_progress:
+                on_progress(relatorio)
+        return relatorio
+
+    @staticmethod
+    def _chave_obrigatoria(linha: dict, campo: str, vistas: set, problemas: dict) -> str:
+        chave = linha.get(campo)
+        if not chave:
+            problemas[campo] = 'Campo obrigatório.'
+        elif chave in vistas:
+            problemas[campo] = 'Valor duplicado no arquivo.'
+        else:
+            vistas.add(chave)
+        return chave
+
+    @staticmethod
+    def _processar_localizacoes(lote: list, vistas: set):
+        mapas = dict(
+            Map.objects
+            .filter(name__in={linha['map'] for _, linha in lote if linha.get('map')})
+            .values_list('name', 'id')
+        )
+
+        validas, erros = [], []
+        for numero, linha in lote:
+            problemas = {}
+            nome = BulkImportService._chave_obrigatoria(linha, 'name', vistas, problemas)
+            map_id = None
+            if linha.get('map'):
+                map_id = mapas.get(linha['map'])
+                if map_id is None:
+                    problemas['map'] = f"Mapa '{linha['map']}' não encontrado."
+            x = _inteiro(linha, 'x_coordinate', problemas, minimo=0)
+            y = _inteiro(linha, 'y_coordinate', problemas, minimo=0)
+
+            if problemas:
+                erros.append({'row': numero, 'errors': problemas})
+                continue
+            validas.append(Location(
+                name=nome,
+                description=linha.get('description') or None,
+                map_id=map_id,
+                x_coordinate=x,
+                y_coordinate=y,
+            ))
+
+        existentes = set(
+            Location.objects.filter(name__in=[local.name for local in validas]).values_list('name', flat=True)
+        )
+        Location.objects.bulk_create(
+            validas,
+            update_conflicts=True,
+            unique_fields=['name'],
+            update_fields=['description', 'map', 'x_coordinate', 'y_coordinate', 'updated_at'],
+        )
+        return len(validas) - len(existentes), len(existentes), erros
+
+    @staticmethod
+    def _processar_ativos(lote: list, vistas: set):
+        localizacoes = dict(
+            Location.objects
+            .filter(name__in={linha['location'] for _, linha in lote if linha.get('location')})
+            .values_list('name', 'id')
+        )
+
+        validos, erros = [], []
+        for numero, linha in lote:
+            problemas = {}
+            tag = BulkImportService._chave_obrigatoria(linha, 'asset_tag', vistas, problemas)
+            if not linha.get('name'):
+                problemas['name'] = 'Campo obrigatório.'
+            location_id = None
+            if linha.get('location'):
+                location_id = localizacoes.get(linha['location'])
+                if location_id is None:
+                    problemas['location'] = f"Localização '{linha['location']}' não encontrada."
+            criticidade = _inteiro(linha, 'criticality', problemas, padrao=3, minimo=1, maximo=5)
+
+            if problemas:
+                erros.append({'row': numero, 'errors': problemas})
+                continue
+            validos.append(Asset(
+                name=linha['name'],
+                asset_tag=tag,
+                location_id=location_id,
+                criticality=criticidade,
+            ))
+
+        existentes = set(
+            Asset.objects.filter(asset_tag__in=[ativo.asset_tag for ativo in validos]).values_list('asset_tag', flat=True)
+        )
+        Asset.objects.bulk_create(
+            validos,
+            update_conflicts=True,
+            unique_fields=['asset_tag'],
+            update_fields=['name', 'location', 'criticality', 'updated_at'],
+        )
+        return len(validos) - len(existentes), len(existentes), erros
+
+    @staticmethod
+    def _processar_pecas(lote: list, vistas: set):
+        """
+        O estoque inicial (quantity_on_hand) só é gravado para peças novas; o
+        saldo de peças existentes é alterado apenas por transações de inventário.
+        """
+        validas, erros = [], []
+        for numero, linha in lote:
+            problemas = {}
+            codigo = BulkImportService._chave_obrigatoria(linha, 'part_number', vistas, problemas)
+            if not linha.get('name'):
+                problemas['name'] = 'Campo obrigatório.'
+            quantidade = _inteiro(linha, 'quantity_on_hand', problemas, padrao=0, minimo=0)
+
+            if problemas:
+                erros.append({'row': numero, 'errors': problemas})
+                continue
+            validas.append(Part(name=linha['name'], part_number=codigo, quantity_on_hand=quantidade))
+
+        existentes = set(
+            Part.objects.filter(part_number__in=[peca.part_number for peca in validas]).values_list('part_number', flat=True)
+        )
+        Part.objects.bulk_create(
+            validas,
+            update_conflicts=True,
+            unique_fields=['part_number'],
+            update_fields=['name'],
+        )
+        return len(validas) - len(existentes), len(existentes), erros
+
+
+# src/apps/work_orders/apps.py
+
+from django.apps import AppConfig
+
+
+class WorkOrdersConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.work_orders'
+
+    def ready(self):
+        # Registra os receivers de sinais do app.
+        from . import signals  # noqa: F401
+
+
+# src/apps/work_orders/signals.py
+# Conectado em WorkOrdersConfig.ready().
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.work_orders.models import WorkOrder
+from apps.work_orders.services import AssetRiskService, PartReservationService
+
+
+@receiver([post_save, post_delete], sender=WorkOrder)
+def atualizar_risco_do_ativo(sender, instance, **kwargs):
+    """
+    Agenda o recálculo do risco do ativo da OS alterada. Os ativos de toda a
+    transação são recalculados juntos, uma única vez, após o commit.
+    """
+    AssetRiskService.agendar_recalculo([instance.asset_id])
+
+
+@receiver(post_save, sender=WorkOrder)
+def liberar_reservas_de_pecas(sender, instance, created, **kwargs):
+    """
+    Devolve ao estoque disponível as reservas de uma OS fechada ou devolvida
+    à espera sem ter sido concluída.
+    """
+    if not created:
+        PartReservationService.liberar_reservas(instance)
+
+
+# src/apps/work_orders/management/commands/compute_asset_risk.py
+
+from django.core.management.base import BaseCommand
+
+from apps.work_orders.services import AssetRiskService
+
+
+class Command(BaseCommand):
+    """
+    Recalcula a pontuação de risco de todos os ativos. Deve ser agendado
+    periodicamente (ex: diariamente), pois as janelas de tempo avançam.
+    """
+    help = 'Recalcula o ranking de risco de todos os ativos.'
+
+    def handle(self, *args, **options):
+        total = AssetRiskService.recalcular()
+        self.stdout.write(self.style.SUCCESS(f"Risco recalculado para {total} ativos."))
+
+
+# src/apps/work_orders/management/commands/compact_inventory.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.work_orders.services import PartReservationService
+
+
+class Command(BaseCommand):
+    """
+    Aplica ao saldo das peças as baixas registradas pelas conclusões de OS.
+    Deve ser agendado periodicamente (ou executado com --loop).
+    """
+    help = 'Compacta as transações de inventário pendentes no saldo de cada peça.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Executa continuamente.')
+        parser.add_argument('--interval', type=float, default=30.0,
+                            help='Pausa em segundos entre execuções no modo --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            resultado = PartReservationService.compactar_estoque()
+            if resultado['compactadas']:
+                self.stdout.write(f"{resultado['compactadas']} peças compactadas.")
+            for part_id in resultado['falhas']:
+                self.stderr.write(f"Peça {part_id}: baixas pendentes excedem o saldo; compactação não aplicada.")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+
+# src/apps/work_orders/management/commands/benchmark_part_completions.py
+
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.core.models import User, Asset, Part, OutboxEvent
+from apps.work_orders.models import WorkOrder
+from apps.work_orders.services import WorkOrderService
+
+
+class Command(BaseCommand):
+    """
+    Conclui muitas OSs em paralelo, todas consumindo a mesma peça, e reporta a
+    vazão para cada quantidade de workers. Cria e remove seus próprios dados;
+    execute apenas em um banco de testes.
+    """
+    help = 'Mede a vazão de conclusões concorrentes de OSs que consomem a mesma peça.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=200, help='OSs concluídas por rodada.')
+        parser.add_argument('--workers', default='1,2,4,8,16',
+                            help='Quantidades de workers a medir, separadas por vírgula.')
+
+    def handle(self, *args, **options):
+        for workers in [int(valor) for valor in options['workers'].split(',')]:
+            usuario, ativo, peca, ordens = self._preparar(options['orders'])
+            try:
+                inicio = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    list(executor.map(
+                        lambda ordem_id: self._concluir(ordem_id, usuario.pk, peca.pk), ordens
+                    ))
+                duracao = time.perf_counter() - inicio
+                self.stdout.write(
+                    f"{workers:>3} workers: {len(ordens) / duracao:8.1f} conclusões/s ({duracao:.2f}s)"
+                )
+            finally:
+                self._limpar(usuario, ativo, peca, ordens)
+
+    @staticmethod
+    def _preparar(quantidade: int):
+        sufixo = uuid.uuid4().hex[:8]
+        usuario = User.objects.create_user(
+            email=f"benchmark-{sufixo}@example.invalid", full_name='Benchmark', role='manager'
+        )
+        ativo = Asset.objects.create(name=f"Benchmark {sufixo}")
+        peca = Part.objects.create(name=f"Benchmark {sufixo}", quantity_on_hand=quantidade)
+        ordens = WorkOrder.objects.bulk_create([
+            WorkOrder(title=f"Benchmark {sufixo} #{indice}", asset=ativo, assigned_to=usuario, status='in_progress')
+            for indice in range(quantidade)
+        ])
+        return usuario, ativo, peca, [ordem.pk for ordem in ordens]
+
+    @staticmethod
+    def _concluir(ordem_id, usuario_id, part_id):
+        try:
+            WorkOrderService.concluir_trabalho_os(
+                WorkOrder.objects.get(pk=ordem_id),
+                {'parts_used': [{'part_id': part_id, 'quantity_used': 1}]},
+                User.objects.get(pk=usuario_id),
+            )
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _limpar(usuario, ativo, peca, ordens):
+        OutboxEvent.objects.filter(aggregate_type='work_order', aggregate_id__in=[str(pk) for pk in ordens]).delete()
+        WorkOrder.objects.filter(pk__in=ordens).delete()
+        peca.delete()
+        ativo.delete()
+        usuario.delete()
+
+
+# src/apps/core/management/commands/import_data.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.importers import BulkImportService
+
+
+class Command(BaseCommand):
+    """
+    Importa Localizações, Ativos ou Peças de um arquivo CSV/XLSX, em lotes.
+    Importe as localizações antes dos ativos que as referenciam.
+    """
+    help = 'Importa localizações, ativos ou peças de um arquivo CSV ou XLSX.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('entity', choices=['locations', 'assets', 'parts'])
+        parser.add_argument('path', help='Caminho do arquivo .csv ou .xlsx.')
+        parser.add_argument('--chunk-size', type=int, default=BulkImportService.CHUNK_SIZE,
+                            help='Quantidade de linhas por lote/transação.')
+
+    def handle(self, *args, **options):
+        def on_progress(relatorio):
+            self.stdout.write(
+                f"{relatorio['processed']} linhas processadas "
+                f"({relatorio['created']} criadas, {relatorio['updated']} atualizadas, "
+                f"{relatorio['error_count']} com erro)..."
+            )
+
+        try:
+            with open(options['path'], 'rb') as arquivo:
+                relatorio = BulkImportService.importar(
+                    options['entity'],
+                    BulkImportService.ler_linhas(arquivo, options['path']),
+                    chunk_size=options['chunk_size'],
+                    on_progress=on_progress,
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for erro in relatorio['errors']:
+            self.stderr.write(f"Linha {erro['row']}: {erro['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Importação concluída: {relatorio['created']} criados, {relatorio['updated']} atualizados, "
+            f"{relatorio['error_count']} linhas com erro."
+        ))
+
+
+# src/apps/core/management/commands/build_heatmap.py
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.core.services import HeatmapService
+
+
+class Command(BaseCommand):
+    """
+    Recalcula os agregados diários do mapa de calor de falhas. Por padrão
+    recalcula hoje e ontem, além dos dias de abertura de OSs e tickets
+    alterados nesse intervalo (mudanças de status ou prioridade);
+    use --since para reconstruir um período inteiro.
+    """
+    help = 'Recalcula os agregados diários do mapa de calor de falhas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2, help='Quantidade de dias recentes a recalcular.')
+        parser.add_argument('--since', type=date.fromisoformat, default=None,
+                            help='Recalcula a partir desta data (AAAA-MM-DD) até hoje.')
+
+    def handle(self, *args, **options):
+        hoje = timezone.localdate()
+        inicio = options['since'] or hoje - timedelta(days=options['days'] - 1)
+        dias = {inicio + timedelta(days=n) for n in range((hoje - inicio).days + 1)}
+        dias |= HeatmapService.dias_alterados(
+            timezone.now() - timedelta(days=options['days'])
+        )
+        for dia in sorted(dias):
+            celulas = HeatmapService.recalcular_dia(dia)
+            self.stdout.write(f"{dia}: {celulas} células.")
+
+
+# src/apps/core/management/commands/archive_records.py
+
+from django.core.management.base import BaseCommand
+
+from apps.core.services import ArchiveService
+
+
+class Command(BaseCommand):
+    """
+    Arquiva tickets, OSs e transações de inventário encerrados há mais de N dias.
+    Pode ser interrompido e executado novamente a qualquer momento.
+    """
+    help = 'Move registros encerrados e antigos para o arquivo histórico, em lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Idade mínima em dias (padrão: CMMS_ARCHIVE_AFTER_DAYS).')
+        parser.add_argument('--batch-size', type=int, default=ArchiveService.BATCH_SIZE,
+                            help='Quantidade de registros por transação.')
+
+    def handle(self, *args, **options):
+        def on_progress(entidade, total):
+            self.stdout.write(f"{entidade}: {total} registros arquivados...")
+
+        totais = ArchiveService.arquivar_registros(
+            dias=options['days'],
+            batch_size=options['batch_size'],
+            on_progress=on_progress,
+        )
+        for entidade, total in totais.items():
+            self.stdout.write(self.style.SUCCESS(f"{entidade}: {total} registros arquivados."))
+
+
+# src/apps/core/management/commands/process_outbox.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core.services import OutboxService
+
+
+class Command(BaseCommand):
+    """
+    Worker do outbox transacional. Pode haver várias instâncias em paralelo:
+    cada lote bloqueia apenas os eventos que está processando.
+    """
+    help = 'Entrega os eventos pendentes do outbox aos consumidores registrados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=OutboxService.BATCH_SIZE,
+                            help='Quantidade de eventos por transação.')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Pausa em segundos quando não há eventos pendentes.')
+        parser.add_argument('--once', action='store_true',
+                            help='Esvazia o outbox uma vez e encerra.')
+
+    def handle(self, *args, **options):
+        while True:
+            processados = OutboxService.processar_lote(options['batch_size'])
+            if processados:
+                self.stdout.write(f"{processados} eventos processados.")
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+
+# src/apps/core/management/commands/purge_outbox.py
+
+from django.core.management.base import BaseCommand
+
+from apps.core.services import OutboxService
+
+
+class Command(BaseCommand):
+    """
+    Remove do outbox os eventos já processados ou descartados mais antigos
+    que o período de retenção. Deve ser agendado periodicamente.
+    """
+    help = 'Remove os eventos processados ou descartados do outbox após o período de retenção.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Retenção em dias (padrão: settings.CMMS_OUTBOX_RETENTION_DAYS, 7).')
+
+    def handle(self, *args, **options):
+        removidos = OutboxService.purgar_eventos(options['days'])
+        self.stdout.write(self.style.SUCCESS(f"{removidos} eventos de outbox removidos."))
+
+
+# src/apps/core/management/commands/purge_idempotency_keys.py
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.core.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    """
+    Remove as chaves de idempotência expiradas. Deve ser agendado periodicamente.
+    """
+    help = 'Remove as chaves de idempotência cuja validade já expirou.'
+
+    def handle(self, *args, **options):
+        removidas, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"{removidas} chaves de idempotência removidas."))
+
+
+# src/apps/core/management/commands/benchmark_response_formats.py
+
+import gzip
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.core.api.renderers import ColumnarJSONRenderer, MessagePackRenderer, msgpack
+from apps.core.middleware import brotli
+
+
+class Command(BaseCommand):
+    """
+    Compara tamanho e tempo de codificação dos formatos de resposta (JSON,
+    JSON colunar e MessagePack, com e sem compressão) para uma listagem
+    sintética com o formato do WorkOrderSerializer. Não acessa o banco.
+    """
+    help = 'Compara tamanho e tempo de codificação dos formatos de resposta da API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Quantidade de linhas da listagem.')
+
+    def handle(self, *args, **options):
+        linhas = self._listagem(options['rows'])
+
+        formatos = [('json', JSONRenderer()), ('columnar', ColumnarJSONRenderer())]
+        if msgpack:
+            formatos.append(('msgpack', MessagePackRenderer()))
+        compressores = [('-', lambda conteudo: conteudo), ('gzip', lambda conteudo: gzip.compress(conteudo, 6))]
+        if brotli:
+            compressores.append(('br', lambda conteudo: brotli.compress(conteudo, quality=5)))
+
+        self.stdout.write(f"{'formato':<10} {'compressão':<11} {'bytes':>12} {'tempo (ms)':>11}")
+        for nome, renderer in formatos:
+            inicio = time.perf_counter()
+            conteudo = renderer.render(linhas)
+            tempo_render = time.perf_counter() - inicio
+            for nome_compressor, comprimir in compressores:
+                inicio = time.perf_counter()
+                comprimido = comprimir(conteudo)
+                tempo = tempo_render + time.perf_counter() - inicio
+                self.stdout.write(f"{nome:<10} {nome_compressor:<11} {len(comprimido):>12} {tempo * 1000:>11.1f}")
+
+    @staticmethod
+    def _listagem(quantidade: int) -> list:
+        agora = timezone.now().isoformat()
+        tecnicos = [
+            {'id': str(uuid.uuid4()), 'full_name': f"Técnico {indice}", 'email': f"tecnico{indice}@example.com"}
+            for indice in range(50)
+        ]
+        ativos = [
+            {'id': str(uuid.uuid4()), 'name': f"Ativo {indice}", 'asset_tag': f"TAG-{indice:05d}"}
+            for indice in range(300)
+        ]
+        return [
+            {
+                'id': str(uuid.uuid4()),
+                'title': f"Ordem de Serviço {indice}",
+                'description': 'Verificar vibração excessiva no rolamento do motor principal.',
+                'status': ['open', 'in_progress', 'completed'][indice % 3],
+                'priority': indice % 5 + 1,
+                'asset': ativos[indice % len(ativos)],
+                'assigned_to': tecnicos[indice % len(tecnicos)],
+                'created_at': agora,
+                'updated_at': agora,
+                'scheduled_start': None,
+                'completed_at': None,
+            }
+            for indice in range(quantidade)
+        ]
+
+
+# src/apps/core/management/commands/benchmark_concurrency.py
+
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """
+    Abre muitas conexões simultâneas de clientes lentos contra um endpoint e
+    mede vazão e latência. Executado uma vez contra o servidor WSGI (Waitress)
+    e outra contra o ASGI (Uvicorn), permite comparar os dois modos de implantação.
+    """
+    help = 'Mede a concorrência de um endpoint sob muitos clientes lentos (WSGI x ASGI).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='URL completa, ex: http://127.0.0.1:8001/api/work-orders/async/')
+        parser.add_argument('--clients', type=int, default=500, help='Conexões simultâneas.')
+        parser.add_argument('--token', default=None, help='Token JWT de acesso (Bearer).')
+        parser.add_argument('--read-delay', type=float, default=0.05,
+                            help='Pausa em segundos entre blocos lidos, simulando uma rede lenta.')
+
+    def handle(self, *args, **options):
+        resultados, duracao = asyncio.run(self._executar(
+            options['url'], options['clients'], options['token'], options['read_delay']
+        ))
+
+        latencias = sorted(latencia for status, latencia in resultados if status == 200)
+        falhas = len(resultados) - len(latencias)
+        self.stdout.write(f"Clientes: {len(resultados)} | Sucesso: {len(latencias)} | Falhas: {falhas}")
+        self.stdout.write(f"Duração total: {duracao:.2f}s | Vazão: {len(latencias) / duracao:.1f} req/s")
+        if latencias:
+            p95 = latencias[max(int(len(latencias) * 0.95) - 1, 0)]
+            self.stdout.write(f"Latência p50: {statistics.median(latencias):.3f}s | p95: {p95:.3f}s")
+
+    async def _executar(self, url, clientes, token, atraso):
+        partes = urlsplit(url)
+        caminho = partes.path + (f"?{partes.query}" if partes.query else '')
+        inicio = time.perf_counter()
+        resultados = await asyncio.gather(*[
+            self._cliente(partes.hostname, partes.port or 80, caminho, token, atraso)
+            for _ in range(clientes)
+        ])
+        return resultados, time.perf_counter() - inicio
+
+    @staticmethod
+    async def _cliente(host, porta, caminho, token, atraso):
+        inicio = time.perf_counter()
+        try:
+            reader, writer = await asyncio.open_connection(host, porta)
+            requisicao = f"GET {caminho} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n"
+            if token:
+                requisicao += f"Authorization: Bearer {token}\r\n"
+            writer.write((requisicao + "\r\n").encode())
+            await writer.drain()
+
+            linha_status = await reader.readline()
+            while await reader.read(1024):
+                if atraso:
+                    await asyncio.sleep(atraso)
+            writer.close()
+            await writer.wait_closed()
+            status = int(linha_status.split()[1])
+        except (OSError, IndexError, ValueError):
+            status = 0
+        return status, time.perf_counter() - inicio
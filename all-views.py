@@ -1,7 +1,22 @@
 # src/apps/core/api/views.py
 
-from rest_framework import generics, permissions
+import uuid
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from ..models import Map, Location
+from ..services import ArchiveService, HeatmapService
+from ..importers import BulkImportService
+from .permissions import IsManagerUser
+from .representation_cache import REPRESENTATION_CACHES
 from .serializers import MapSerializer, LocationSerializer
 
 class MapListCreateAPIView(generics.ListCreateAPIView):
@@ -22,13 +37,446 @@ class LocationListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = LocationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+class MapHeatmapAPIView(APIView):
+    """
+    Mapa de calor de falhas de um mapa, lido dos agregados diários.
+    Parâmetros: start, end (AAAA-MM-DD; padrão: últimos 30 dias), source
+    (work_order | ticket), status, priority.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_resultado(self, request, id):
+        params = request.query_params
+        try:
+            fim = date.fromisoformat(params['end']) if params.get('end') else timezone.localdate()
+            inicio = date.fromisoformat(params['start']) if params.get('start') else fim - timedelta(days=29)
+            priority = int(params['priority']) if params.get('priority') else None
+        except ValueError:
+            raise ValidationError({'detail': 'Parâmetros de período ou prioridade inválidos.'})
+        return HeatmapService.consultar(
+            id, inicio, fim,
+            source=params.get('source'),
+            status=params.get('status'),
+            priority=priority,
+        )
+
+    def get(self, request, id):
+        get_object_or_404(Map, id=id)
+        return Response(self.get_resultado(request, id))
+
+class MapHeatmapOverlayAPIView(MapHeatmapAPIView):
+    """
+    Mapa de calor renderizado como PNG transparente para sobrepor à imagem do mapa.
+    Aceita os mesmos parâmetros; o resultado fica em cache por CMMS_HEATMAP_CACHE_SECONDS.
+    """
+    def get(self, request, id):
+        mapa = get_object_or_404(Map, id=id)
+        chave = f"heatmap-overlay:{id}:{request.query_params.urlencode()}"
+        png = cache.get(chave)
+        if png is None:
+            png = HeatmapService.renderizar_overlay(
+                mapa.image.width, mapa.image.height, self.get_resultado(request, id)
+            )
+            cache.set(chave, png, getattr(settings, 'CMMS_HEATMAP_CACHE_SECONDS', 3600))
+        return HttpResponse(png, content_type='image/png')
+
+class HistoryAPIView(APIView):
+    """
+    Leitura unificada de histórico/auditoria: combina registros operacionais e
+    arquivados de um tipo de entidade.
+    Parâmetros: entity_type (obrigatório), asset, ticket, work_order, start, end
+    (AAAA-MM-DD, inclusivos), limit. Restrito a Gerentes.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsManagerUser]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            limite = min(int(params.get('limit', 100)), 1000)
+            inicio = date.fromisoformat(params['start']) if params.get('start') else None
+            fim = date.fromisoformat(params['end']) if params.get('end') else None
+            asset_id, ticket_id, work_order_id = (
+                uuid.UUID(params[nome]) if params.get(nome) else None
+                for nome in ('asset', 'ticket', 'work_order')
+            )
+        except ValueError:
+            return Response(
+                {'detail': 'Parâmetros de período, limite ou identificadores inválidos.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            registros = ArchiveService.consultar_historico(
+                entity_type=params.get('entity_type'),
+                asset_id=asset_id,
+                ticket_id=ticket_id,
+                work_order_id=work_order_id,
+                inicio=inicio,
+                fim=fim,
+                limite=limite,
+            )
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(registros)
+
+class BulkImportAPIView(APIView):
+    """
+    Importação em massa de 'locations', 'assets' ou 'parts' a partir de um
+    arquivo CSV/XLSX enviado no campo 'file'. Retorna o relatório com os erros por linha.
+    Restrito a Gerentes.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsManagerUser]
+
+    def post(self, request, entity):
+        arquivo = request.FILES.get('file')
+        if arquivo is None:
+            return Response({'file': 'Envie um arquivo CSV ou XLSX.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            relatorio = BulkImportService.importar(
+                entity, BulkImportService.ler_linhas(arquivo.file, arquivo.name)
+            )
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(relatorio)
+
+class RepresentationCacheMetricsAPIView(APIView):
+    """
+    Métricas dos caches de representações (acertos, falhas e memória) deste processo.
+    Restrito a Gerentes.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsManagerUser]
+
+    def get(self, request):
+        return Response([cache.metricas() for cache in REPRESENTATION_CACHES])
+
+# src/apps/core/api/renderers.py
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import msgpack
+except ImportError:  # Dependência opcional: pip install msgpack
+    msgpack = None
+
+
+def _achatar(dado: dict, prefixo: str = ''):
+    """Achata objetos aninhados em colunas com nomes pontuados (ex: 'asset.name')."""
+    for chave, valor in dado.items():
+        if isinstance(valor, dict):
+            yield from _achatar(valor, f"{prefixo}{chave}.")
+        else:
+            yield f"{prefixo}{chave}", valor
+
+
+def _colunavel(dado) -> bool:
+    """Só listas de objetos são convertidas; listas de valores (ex: erros) seguem como JSON comum."""
+    return isinstance(dado, list) and all(isinstance(item, dict) for item in dado)
+
+
+def para_colunas(linhas: list) -> dict:
+    """
+    Converte uma lista de objetos em {'columns': [...], 'rows': [[...], ...]},
+    enviando os nomes dos campos uma única vez.
+    """
+    achatadas = [dict(_achatar(linha)) for linha in linhas]
+    colunas = list(dict.fromkeys(coluna for linha in achatadas for coluna in linha))
+    return {
+        'columns': colunas,
+        'rows': [[linha.get(coluna) for coluna in colunas] for linha in achatadas],
+    }
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    JSON colunar para listagens: nomes de campos enviados uma vez e objetos
+    aninhados achatados. Respostas que não são listas são enviadas como JSON comum.
+    Selecionado com 'Accept: application/vnd.cmms.columnar+json'.
+    """
+    media_type = 'application/vnd.cmms.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if _colunavel(data):
+            data = para_colunas(data)
+        elif isinstance(data, dict) and _colunavel(data.get('results')):
+            data = {**data, 'results': para_colunas(data['results'])}
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Serialização binária MessagePack. Selecionado com 'Accept: application/msgpack'.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=str, use_bin_type=True)
+
+
+# Renderers das listagens e detalhes de OSs e Tickets; MessagePack só é oferecido se instalado.
+COMPACT_RENDERER_CLASSES = (
+    list(api_settings.DEFAULT_RENDERER_CLASSES)
+    + [ColumnarJSONRenderer]
+    + ([MessagePackRenderer] if msgpack else [])
+)
+
+# src/apps/core/middleware.py
+
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # Dependência opcional: pip install brotli
+    brotli = None
+
+
+class CompressionMiddleware:
+    """
+    Comprime respostas grandes com brotli (se instalado) ou gzip, conforme o
+    cabeçalho Accept-Encoding. Substitui o GZipMiddleware em settings.MIDDLEWARE.
+    Respostas menores que CMMS_COMPRESSION_MIN_BYTES (1024) não são comprimidas.
+
+    Mitigação de BREACH: o gzip recebe os mesmos bytes aleatórios no cabeçalho
+    que o GZipMiddleware adiciona (max_random_bytes). O brotli não tem onde
+    inserir esse preenchimento, por isso só é usado em respostas que não são
+    HTML: a API autentica pelo cabeçalho Authorization e não devolve tokens
+    secretos (CSRF, sessão) no corpo, enquanto as páginas HTML (admin) seguem
+    sempre com gzip.
+    """
+    max_random_bytes = 100
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_bytes = getattr(settings, 'CMMS_COMPRESSION_MIN_BYTES', 1024)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.streaming or response.has_header('Content-Encoding') or len(response.content) < self.min_bytes:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        aceitas = self._codificacoes_aceitas(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        html = response.get('Content-Type', '').startswith('text/html')
+        if brotli and 'br' in aceitas and not html:
+            codificacao, conteudo = 'br', brotli.compress(response.content, quality=5)
+        elif 'gzip' in aceitas:
+            codificacao = 'gzip'
+            conteudo = compress_string(response.content, max_random_bytes=self.max_random_bytes)
+        else:
+            return response
+
+        if len(conteudo) >= len(response.content):
+            return response
+
+        response.content = conteudo
+        response.headers['Content-Length'] = str(len(conteudo))
+        response.headers['Content-Encoding'] = codificacao
+        if response.has_header('ETag'):
+            response.headers['ETag'] = re.sub(r'^"', 'W/"', response.headers['ETag'])
+        return response
+
+    @staticmethod
+    def _codificacoes_aceitas(cabecalho: str) -> set:
+        aceitas = set()
+        for item in cabecalho.split(','):
+            nome, _, parametros = item.strip().partition(';')
+            if parametros.replace(' ', '') in ['q=0', 'q=0.0']:
+                continue
+            aceitas.add(nome.strip().lower())
+        return aceitas
+
+# src/apps/core/api/idempotency.py
+
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.core.models import IdempotencyKey
+
+
+def idempotente(handler):
+    """
+    Decorator para métodos POST de views DRF que honra o cabeçalho 'Idempotency-Key'.
+    A primeira requisição com a chave é executada e sua resposta é guardada;
+    repetições com a mesma chave recebem a resposta guardada sem reexecutar o
+    serviço. Erros 5xx e exceções liberam a chave para uma nova tentativa.
+    A validade é definida por settings.CMMS_IDEMPOTENCY_TTL_HOURS (24 horas).
+    Uma chave em processamento há mais de settings.CMMS_IDEMPOTENCY_LEASE_SECONDS
+    (300 segundos) é considerada abandonada (ex: o processo morreu) e é retomada.
+    """
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        chave = request.headers.get('Idempotency-Key')
+        if not chave:
+            return handler(view, request, *args, **kwargs)
+
+        agora = timezone.now()
+        prazo_em_processamento = timedelta(seconds=getattr(settings, 'CMMS_IDEMPOTENCY_LEASE_SECONDS', 300))
+        IdempotencyKey.objects.filter(user=request.user, key=chave).filter(
+            Q(expires_at__lte=agora)
+            | Q(status_code__isnull=True, created_at__lte=agora - prazo_em_processamento)
+        ).delete()
+        registro, criado = IdempotencyKey.objects.get_or_create(
+            user=request.user,
+            key=chave,
+            defaults={
+                'method': request.method,
+                'path': request.path,
+                'expires_at': agora + timedelta(hours=getattr(settings, 'CMMS_IDEMPOTENCY_TTL_HOURS', 24)),
+            },
+        )
+
+        if not criado:
+            if registro.method != request.method or registro.path != request.path:
+                return Response(
+                    {'detail': 'Esta Idempotency-Key já foi utilizada em outra requisição.'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if registro.status_code is None:
+                return Response(
+                    {'detail': 'Uma requisição com esta Idempotency-Key ainda está em processamento.'},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            return Response(
+                registro.response_body,
+                status=registro.status_code,
+                headers={'Idempotent-Replayed': 'true'},
+            )
+
+        try:
+            resposta = handler(view, request, *args, **kwargs)
+        except Exception:
+            registro.delete()
+            raise
+
+        if resposta.status_code >= 500:
+            registro.delete()
+        else:
+            # update() em vez de save(): a chave pode ter sido retomada por uma repetição.
+            IdempotencyKey.objects.filter(pk=registro.pk).update(
+                status_code=resposta.status_code,
+                response_body=resposta.data,
+            )
+        return resposta
+
+    return wrapper
+
+# src/apps/core/api/async_views.py
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views import View
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+
+class AsyncReadOnlyAPIView(View):
+    """
+    Base para endpoints de leitura assíncronos, servidos em modo ASGI.
+    Autentica o token JWT (Bearer) como a API síncrona, mas sem prender um
+    worker enquanto o cliente lento recebe a resposta.
+    """
+    http_method_names = ['get', 'options']
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await self.autenticar(request)
+        if request.user is None:
+            return JsonResponse(
+                {'detail': 'As credenciais de autenticação não foram fornecidas ou são inválidas.'},
+                status=401,
+            )
+        return await super().dispatch(request, *args, **kwargs)
+
+    @staticmethod
+    async def autenticar(request):
+        try:
+            resultado = await sync_to_async(JWTAuthentication().authenticate)(request)
+        except (AuthenticationFailed, InvalidToken):
+            return None
+        return resultado[0] if resultado else None
+
+    async def listar(self, request, queryset, serializer_class):
+        """
+        Serializa a listagem com a mesma paginação por página da API síncrona
+        (REST_FRAMEWORK['PAGE_SIZE'] e ?page=), usando o ORM assíncrono para a
+        contagem e para a leitura da página. O envelope segue o PageNumberPagination.
+        """
+        tamanho = api_settings.PAGE_SIZE
+        if api_settings.DEFAULT_PAGINATION_CLASS is None or not tamanho:
+            objetos = [objeto async for objeto in queryset]
+            return JsonResponse(serializer_class(objetos, many=True).data, safe=False)
+
+        try:
+            pagina = int(request.GET.get('page', 1))
+        except ValueError:
+            pagina = 0
+        total = await queryset.acount()
+        ultima = max(1, -(-total // tamanho))
+        if not 1 <= pagina <= ultima:
+            return JsonResponse({'detail': 'Página inválida.'}, status=404)
+
+        inicio = (pagina - 1) * tamanho
+        objetos = [objeto async for objeto in queryset[inicio:inicio + tamanho]]
+        url = request.build_absolute_uri()
+        anterior = None
+        if pagina > 1:
+            anterior = remove_query_param(url, 'page') if pagina == 2 else replace_query_param(url, 'page', pagina - 1)
+        return JsonResponse({
+            'count': total,
+            'next': replace_query_param(url, 'page', pagina + 1) if pagina < ultima else None,
+            'previous': anterior,
+            'results': serializer_class(objetos, many=True).data,
+        })
+
+    @staticmethod
+    def nao_encontrado():
+        return JsonResponse({'detail': 'Não encontrado.'}, status=404)
+
+    @staticmethod
+    def proibido():
+        return JsonResponse({'detail': 'Você não tem permissão para executar essa ação.'}, status=403)
+
 #src/apps/work_orders/api/views.py
 
-from rest_framework import generics
+from datetime import date
+
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
-from apps.work_orders.models import WorkOrder
-from .serializers import WorkOrderSerializer, WorkOrderCreateSerializer
+from rest_framework.response import Response
+from apps.work_orders.models import WorkOrder, AssetRiskScore, Meter, MeterReadingDaily
+from apps.work_orders.services import WorkOrderService, PartReservationService, MeterService
+from .serializers import (
+    WorkOrderSerializer, WorkOrderCreateSerializer, WorkOrderCompletionSerializer, TicketTriageSerializer,
+    PartReservationInputSerializer, PartReservationSerializer, AssetRiskScoreSerializer,
+    MeterReadingInputSerializer, MeterReadingDailySerializer,
+)
 from apps.core.api.permissions import IsManagerUser
+from apps.core.api.async_views import AsyncReadOnlyAPIView
+from apps.core.api.idempotency import idempotente
+from apps.core.api.renderers import COMPACT_RENDERER_CLASSES
 from .permissions import IsManagerOrAssignedTechnician
 
 class WorkOrderListCreateAPIView(generics.ListCreateAPIView):
@@ -38,6 +486,7 @@ class WorkOrderListCreateAPIView(generics.ListCreateAPIView):
     - Apenas Gerentes (Managers) podem criar.
     """
     queryset = WorkOrder.objects.select_related('asset', 'assigned_to').all()
+    renderer_classes = COMPACT_RENDERER_CLASSES
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -51,6 +500,10 @@ class WorkOrderListCreateAPIView(generics.ListCreateAPIView):
             self.permission_classes = [IsAuthenticated]
         return super().get_permissions()
 
+    @idempotente
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
 class WorkOrderDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     """
     View para detalhar, atualizar e deletar uma Ordem de Serviço específica.
@@ -60,29 +513,229 @@ class WorkOrderDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     queryset = WorkOrder.objects.select_related('asset', 'assigned_to').all()
     serializer_class = WorkOrderSerializer
     permission_classes = [IsAuthenticated, IsManagerOrAssignedTechnician]
+    renderer_classes = COMPACT_RENDERER_CLASSES
     lookup_field = 'id'
 
     def get_serializer_context(self):
         """Adiciona o request ao contexto do serializer."""
         return {'request': self.request}
+
+class TicketTriageAPIView(generics.GenericAPIView):
+    """
+    Triagem em lote: cria as Ordens de Serviço de vários tickets em uma única
+    transação. Corpo: {"ticket_ids": [...]}. Retorna o resultado de cada ticket.
+    Apenas Gerentes. Aceita 'Idempotency-Key'.
+    """
+    serializer_class = TicketTriageSerializer
+    permission_classes = [IsAuthenticated, IsManagerUser]
+
+    @idempotente
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        resultados = WorkOrderService.criar_os_em_lote(serializer.validated_data['ticket_ids'])
+        return Response(resultados, status=status.HTTP_200_OK)
+
+class WorkOrderApproveAPIView(generics.GenericAPIView):
+    """
+    Registra a aprovação de manutenção ou de produção de uma Ordem de Serviço.
+    Corpo: {"approval_type": "maintenance" | "production"}. Aceita 'Idempotency-Key'.
+    """
+    queryset = WorkOrder.objects.select_related('asset', 'assigned_to')
+    permission_classes = [IsAuthenticated, IsManagerUser]
+    lookup_field = 'id'
+
+    @idempotente
+    def post(self, request, id):
+        aprovar = {
+            'maintenance': WorkOrderService.aprovar_os_manutencao,
+            'production': WorkOrderService.aprovar_os_producao,
+        }.get(request.data.get('approval_type'))
+        if aprovar is None:
+            return Response(
+                {'approval_type': "Informe 'maintenance' ou 'production'."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            ordem = aprovar(self.get_object(), request.user)
+        except PermissionError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(WorkOrderSerializer(ordem).data)
+
+class WorkOrderCompleteAPIView(generics.GenericAPIView):
+    """
+    Conclui uma Ordem de Serviço em andamento, registrando peças e fotos.
+    Aceita 'Idempotency-Key' para que reenvios do técnico não dupliquem o trabalho.
+    """
+    queryset = WorkOrder.objects.select_related('asset', 'assigned_to')
+    serializer_class = WorkOrderCompletionSerializer
+    permission_classes = [IsAuthenticated, IsManagerOrAssignedTechnician]
+    lookup_field = 'id'
+
+    @idempotente
+    def post(self, request, id):
+        ordem = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            ordem = WorkOrderService.concluir_trabalho_os(ordem, serializer.validated_data, request.user)
+        except PermissionError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(WorkOrderSerializer(ordem).data)
+
+class WorkOrderPartReservationAPIView(generics.GenericAPIView):
+    """
+    Lista (GET) ou registra (POST, lista de {"part_id", "quantity"}) as peças
+    reservadas para uma Ordem de Serviço. As reservas ficam ativas quando a OS é liberada.
+    """
+    queryset = WorkOrder.objects.all()
+    serializer_class = PartReservationInputSerializer
+    permission_classes = [IsAuthenticated, IsManagerOrAssignedTechnician]
+    lookup_field = 'id'
+
+    def get(self, request, id):
+        reservas = self.get_object().part_reservations.all()
+        return Response(PartReservationSerializer(reservas, many=True).data)
+
+    @idempotente
+    def post(self, request, id):
+        ordem = self.get_object()
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            reservas = PartReservationService.planejar_pecas(ordem, serializer.validated_data)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(PartReservationSerializer(reservas, many=True).data, status=status.HTTP_201_CREATED)
+
+class AssetRiskRankingPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter que acrescenta 'asset_id' como desempate a qualquer ordenação,
+    já que várias pontuações se repetem e a paginação por página exige ordem única.
+    """
+    def get_ordering(self, request, queryset, view):
+        ordenacao = list(super().get_ordering(request, queryset, view) or [])
+        if 'asset_id' not in ordenacao and '-asset_id' not in ordenacao:
+            ordenacao.append('asset_id')
+        return ordenacao
+
+class AssetRiskRankingListAPIView(generics.ListAPIView):
+    """
+    Ranking paginado dos ativos de maior risco, lido da tabela pré-calculada.
+    Ordenação via ?ordering= (padrão: -score), sempre desempatada por asset_id.
+    """
+    queryset = AssetRiskScore.objects.select_related('asset')
+    serializer_class = AssetRiskScoreSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = AssetRiskRankingPagination
+    filter_backends = [StableOrderingFilter]
+    ordering_fields = ['score', 'criticality', 'failure_count', 'open_backlog', 'mean_repair_hours']
+    ordering = ['-score', 'asset_id']
+
+class WorkOrderAsyncListAPIView(AsyncReadOnlyAPIView):
+    """
+    Variante assíncrona (ASGI) da listagem de Ordens de Serviço, com a mesma
+    visibilidade e paginação de WorkOrderListCreateAPIView.
+    """
+    async def get(self, request):
+        queryset = WorkOrder.objects.select_related('asset', 'assigned_to')
+        return await self.listar(request, queryset, WorkOrderSerializer)
+
+class WorkOrderAsyncDetailAPIView(AsyncReadOnlyAPIView):
+    """
+    Variante assíncrona (ASGI) do detalhe de uma Ordem de Serviço.
+    Apenas Gerentes/Administradores ou o Técnico atribuído podem consultá-la.
+    """
+    async def get(self, request, id):
+        try:
+            ordem = await WorkOrder.objects.select_related('asset', 'assigned_to').aget(id=id)
+        except WorkOrder.DoesNotExist:
+            return self.nao_encontrado()
+        if request.user.role not in ['manager', 'admin'] and ordem.assigned_to_id != request.user.pk:
+            return self.proibido()
+        return JsonResponse(WorkOrderSerializer(ordem).data)
+
+class MeterReadingBulkCreateAPIView(generics.GenericAPIView):
+    """
+    Ingestão em lote de leituras de um medidor (POST com uma lista de leituras).
+    Retorna os IDs das Ordens de Serviço de PM disparadas pelo lote.
+    """
+    serializer_class = MeterReadingInputSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, id):
+        meter = get_object_or_404(Meter, id=id)
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        ordens_criadas = MeterService.registrar_leituras(meter, serializer.validated_data)
+        return Response(
+            {
+                'readings_created': len(serializer.validated_data),
+                'work_orders_created': [str(ordem.id) for ordem in ordens_criadas],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+class MeterReadingDailyListAPIView(generics.ListAPIView):
+    """
+    Lista os agregados diários de um medidor, com filtro opcional por período
+    (?start=AAAA-MM-DD&end=AAAA-MM-DD).
+    """
+    serializer_class = MeterReadingDailySerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = MeterReadingDaily.objects.filter(meter_id=self.kwargs['id'])
+        params = self.request.query_params
+        try:
+            start = date.fromisoformat(params['start']) if params.get('start') else None
+            end = date.fromisoformat(params['end']) if params.get('end') else None
+        except ValueError:
+            raise ValidationError({'detail': 'Parâmetros de período inválidos.'})
+        if start:
+            queryset = queryset.filter(day__gte=start)
+        if end:
+            queryset = queryset.filter(day__lte=end)
+        return queryset
     
 #src/apps/tickets/api/views.py
 
+from django.db.models import Prefetch
+from django.http import JsonResponse
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 
 # Importando nossos modelos e serializers
-from apps.tickets.models import Ticket
-from .serializers import TicketSerializer, TicketCreateSerializer
+from apps.tickets.models import Ticket, TicketComment
+from apps.work_orders.models import WorkOrder, WorkOrderPart
+from .serializers import TicketSerializer, TicketCreateSerializer, TicketTimelineSerializer
 
 # Importando nossas novas permissões customizadas
 from apps.core.api.permissions import CanCreateTicket, IsOwnerOrReadOnly
+from apps.core.api.async_views import AsyncReadOnlyAPIView
+from apps.core.api.idempotency import idempotente
+from apps.core.api.renderers import COMPACT_RENDERER_CLASSES
 
 class TicketListCreateAPIView(generics.ListCreateAPIView):
     """
     View para listar todos os tickets (GET) e criar um novo ticket (POST).
     """
     queryset = Ticket.objects.all().select_related('asset', 'requester')
+    renderer_classes = COMPACT_RENDERER_CLASSES
     
     def get_serializer_class(self):
         """
@@ -104,6 +757,10 @@ class TicketListCreateAPIView(generics.ListCreateAPIView):
             self.permission_classes = [IsAuthenticated]
         return super().get_permissions()
 
+    @idempotente
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         """
         Define o 'requester' do ticket como o usuário autenticado que fez a requisição.
@@ -115,7 +772,56 @@ class TicketDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     """
     View para ver, atualizar ou deletar um ticket específico.
     """
-    queryset = Ticket.objects.all()
+    queryset = Ticket.objects.select_related('asset', 'requester')
     serializer_class = TicketSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
-    lookup_field = 'id'
\ No newline at end of file
+    renderer_classes = COMPACT_RENDERER_CLASSES
+    lookup_field = 'id'
+
+
+class TicketTimelineAPIView(generics.RetrieveAPIView):
+    """
+    Linha do tempo completa de um ticket: comentários, OSs vinculadas (com
+    aprovações, peças e miniaturas das fotos) e feedback, em uma única resposta.
+    Sempre executa 5 consultas, independentemente do volume de comentários e OSs.
+    """
+    queryset = (
+        Ticket.objects
+        .select_related('asset', 'requester', 'feedback__user')
+        .prefetch_related(
+            Prefetch('comments', queryset=TicketComment.objects.select_related('user')),
+            Prefetch(
+                'work_orders',
+                queryset=WorkOrder.objects
+                .select_related('assigned_to', 'maintenance_approver', 'production_approver')
+                .prefetch_related(
+                    Prefetch('workorderpart_set', queryset=WorkOrderPart.objects.select_related('part')),
+                    'photos',
+                ),
+            ),
+        )
+    )
+    serializer_class = TicketTimelineSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'id'
+
+
+class TicketAsyncListAPIView(AsyncReadOnlyAPIView):
+    """
+    Variante assíncrona (ASGI) da listagem de tickets.
+    """
+    async def get(self, request):
+        queryset = Ticket.objects.select_related('asset', 'requester')
+        return await self.listar(request, queryset, TicketSerializer)
+
+
+class TicketAsyncDetailAPIView(AsyncReadOnlyAPIView):
+    """
+    Variante assíncrona (ASGI) do detalhe de um ticket.
+    """
+    async def get(self, request, id):
+        try:
+            ticket = await Ticket.objects.select_related('asset', 'requester').aget(id=id)
+        except Ticket.DoesNotExist:
+            return self.nao_encontrado()
+        return JsonResponse(TicketSerializer(ticket).data)